@@ -4,16 +4,25 @@
 import asyncio
 import json
 import random
+import re
+import time
 from pathlib import Path
 from pyppeteer import launch
+from pyppeteer.errors import NetworkError, TimeoutError as PyppeteerTimeoutError
 from pyppeteer.page import Page # Specific import for type hinting
 from pyppeteer.browser import Browser # Specific import for type hinting
-from typing import Optional
+from typing import Awaitable, Callable, List, Optional
+from pyppeteer.network_manager import Request, Response # Specific import for type hinting
 
 from igscraper.logger import Logger
+from igscraper.ratelimit import AsyncTokenBucket
 from igscraper.config import (
     COOKIES_FILENAME,
-    INSTAGRAM_SESSION_COOKIES
+    COOKIES_MAX_AGE_S,
+    INSTAGRAM_BASE_URL,
+    BLOCKED_RESOURCE_TYPES,
+    INSTAGRAM_SESSION_COOKIES,
+    INSTAGRAM_SESSION_COOKIES_PARSED
 )
 
 async def setup_browser() -> Browser:
@@ -21,13 +30,26 @@ async def setup_browser() -> Browser:
     try:
         Logger.info('Launching browser...')
         
+        # Minimal flag set for headless scraping: skip Chromium subsystems
+        # (sync, extensions, background networking, ...) the scraper never uses.
         launch_args = [
             '--no-sandbox',
             '--disable-setuid-sandbox',
             '--disable-dev-shm-usage',
-            '--disable-accelerated-2d-canvas',
-            '--disable-gpu',
-            '--window-size=1920x1080',
+            '--disable-background-networking',
+            '--disable-default-apps',
+            '--disable-extensions',
+            '--disable-sync',
+            '--metrics-recording-only',
+            '--mute-audio',
+            '--no-first-run',
+            '--no-default-browser-check',
+            '--disable-blink-features=AutomationControlled',
+            # Images are never requested at all, so they don't cost an interception round-trip
+            # each (BLOCKED_RESOURCE_TYPES still catches anything that slips through).
+            '--blink-settings=imagesEnabled=false',
+            # defaultViewport is None, so the window size is the page viewport.
+            '--window-size=1920,1080',
         ]
 
         browser = await launch({
@@ -40,10 +62,156 @@ async def setup_browser() -> Browser:
         Logger.error(f'Error setting up browser: {str(e)}')
         raise
 
+async def configure_page(page: Page, request_handler: Optional[Callable[[Request], Awaitable[None]]] = None) -> None:
+    """Enables request interception on the page and aborts heavy resource types.
+
+    Args:
+        page: The page to configure.
+        request_handler: Optional coroutine that takes over every request that is
+                         not blocked (e.g. proxy routing). Defaults to continuing it.
+    """
+    async def _on_request(request: Request) -> None:
+        try:
+            if request.resourceType in BLOCKED_RESOURCE_TYPES:
+                await request.abort()
+            elif request_handler:
+                await request_handler(request)
+            else:
+                await request.continue_()
+        except Exception as e:
+            # Requests can be cancelled by navigation before we handle them.
+            Logger.warning(f'Error intercepting request {request.url[:80]}: {e}')
+
+    await page.setRequestInterception(True)
+    # Page events are dispatched synchronously, so schedule the coroutine.
+    page.on('request', lambda req: asyncio.ensure_future(_on_request(req)))
+    Logger.info(f"Request interception enabled. Blocking resource types: {sorted(BLOCKED_RESOURCE_TYPES)}")
+
+async def wait_for_network_idle(page: Page, idle_ms: int = 500, timeout_ms: int = 2000) -> bool:
+    """Waits until the page has had no requests in flight for `idle_ms`.
+
+    Unlike `waitUntil: networkidle0`, the wait is capped at `timeout_ms`, so
+    long-poll and analytics traffic cannot hold it open. Returns True if the
+    network went idle, False if the cap was hit first.
+    """
+    loop = asyncio.get_event_loop()
+    pending = set()
+    last_activity = loop.time()
+
+    def on_start(request: Request) -> None:
+        nonlocal last_activity
+        pending.add(request)
+        last_activity = loop.time()
+
+    def on_done(request: Request) -> None:
+        nonlocal last_activity
+        pending.discard(request)
+        last_activity = loop.time()
+
+    page.on('request', on_start)
+    page.on('requestfinished', on_done)
+    page.on('requestfailed', on_done)
+    try:
+        deadline = loop.time() + timeout_ms / 1000
+        while loop.time() < deadline:
+            if not pending and loop.time() - last_activity >= idle_ms / 1000:
+                return True
+            await asyncio.sleep(0.05)
+        return False
+    finally:
+        page.remove_listener('request', on_start)
+        page.remove_listener('requestfinished', on_done)
+        page.remove_listener('requestfailed', on_done)
+
+async def wait_for_first(*awaitables: Awaitable) -> bool:
+    """Waits until the first of `awaitables` succeeds, then cancels the rest.
+
+    Returns True if one of them completed without raising, False if all failed.
+    Cancelling only stops the wrapper tasks; whatever they started (e.g. a
+    pyppeteer WaitTask polling in the page) runs on until its own timeout.
+    """
+    pending = {asyncio.ensure_future(a) for a in awaitables}
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            # Retrieve every finished task's exception, not just up to the first success,
+            # so asyncio doesn't report the others as never retrieved.
+            errors = [task.exception() for task in done if not task.cancelled()]
+            if any(error is None for error in errors):
+                return True
+        return False
+    finally:
+        for task in pending:
+            task.cancel()
+
+async def wait_for_page_ready(page: Page, selector: str, timeout_ms: int = 3000) -> bool:
+    """After a `load` navigation, waits for `selector` or a short network-idle
+    window, whichever comes first.
+
+    If the network goes idle first, the selector's in-page poll keeps running
+    until `timeout_ms`, so keep that timeout short.
+    """
+    return await wait_for_first(
+        page.waitForSelector(selector, {'timeout': timeout_ms}),
+        wait_for_network_idle(page)
+    )
+
+# Redirect targets Instagram uses instead of a 429 when it wants a client to slow down
+_SOFT_BLOCK_URL_RE = re.compile(r'/accounts/login|/challenge/')
+
+async def goto_with_backoff(page: Page, url: str, options: Optional[dict] = None,
+                            tries: int = 5, base: float = 1.5,
+                            limiter: Optional[AsyncTokenBucket] = None) -> Optional[Response]:
+    """Navigates to `url`, retrying transient failures with exponential backoff.
+
+    Retries on navigation timeouts, network errors and HTTP 429/5xx responses,
+    honoring a numeric Retry-After header when present. The final failure is
+    re-raised (or its response returned) so callers keep their error handling.
+    If a shared `limiter` is given, every attempt waits for a token, and a 429
+    or a redirect to the login/challenge wall slows down all workers using it,
+    not just this one.
+    """
+    for attempt in range(tries):
+        delay = base ** attempt + random.random()
+        if limiter:
+            await limiter.acquire()
+        try:
+            response = await page.goto(url, options or {})
+        except (PyppeteerTimeoutError, NetworkError) as e:
+            if attempt == tries - 1:
+                raise
+            Logger.warning(f'Navigation to {url} failed ({e}). Retry {attempt+1}/{tries-1} in {delay:.1f}s...')
+        else:
+            if limiter and _SOFT_BLOCK_URL_RE.search(page.url) and not _SOFT_BLOCK_URL_RE.search(url):
+                # Instagram's soft block: not an HTTP error, but a sign we're going too fast.
+                limiter.penalize()
+            if not response or not (response.status == 429 or response.status >= 500) or attempt == tries - 1:
+                return response
+            retry_after = response.headers.get('retry-after', '')
+            if retry_after.isdigit():
+                delay = max(delay, float(retry_after))
+            if limiter and response.status == 429:
+                limiter.penalize(float(retry_after) if retry_after.isdigit() else None)
+            Logger.warning(f'Navigation to {url} returned HTTP {response.status}. Retry {attempt+1}/{tries-1} in {delay:.1f}s...')
+        await asyncio.sleep(delay)
+    # Only reached without a single attempt; the last attempt always returns or raises.
+    raise ValueError(f'tries must be at least 1, got {tries}')
+
+def saved_cookies_age_s() -> Optional[float]:
+    """Returns how long ago the cookies file was written, or None if there is none."""
+    try:
+        return time.time() - Path(COOKIES_FILENAME).stat().st_mtime
+    except OSError:
+        return None
+
 async def save_cookies(page: Page) -> bool:
-    """Saves the current page's cookies to a JSON file."""
+    """Saves the browser's Instagram cookies to a JSON file."""
     try:
-        cookies = await page.cookies()
+        # Ask for Instagram's cookies explicitly so this also works from about:blank.
+        cookies = await page.cookies(INSTAGRAM_BASE_URL)
+        if not cookies:
+            Logger.warning('No Instagram cookies to save; keeping the existing cookies file.')
+            return False
         # Use project root from config? For now, assume current dir.
         cookies_path = Path(COOKIES_FILENAME) 
         with open(cookies_path, 'w') as f:
@@ -54,93 +222,139 @@ async def save_cookies(page: Page) -> bool:
         Logger.error(f'Error saving cookies: {str(e)}')
         return False
 
-async def load_cookies(page: Page) -> bool:
-    """Loads cookies into the page, prioritizing environment variable then file."""
-    cookies_loaded = False
-    
+async def _set_cookies(page: Page, cookies: List[dict]) -> None:
+    """Sets all cookies with one Network.setCookies call.
+
+    page.setCookie first sends a Network.deleteCookies per cookie, which is
+    pointless on a fresh page. Saved cookies carry their own domain, so no page
+    URL is needed. Falls back to setCookie if the direct call is rejected.
+    """
+    try:
+        await page._client.send('Network.setCookies', {'cookies': cookies})
+    except Exception as e:
+        Logger.warning(f'Batched cookie set failed ({e}); falling back to page.setCookie.')
+        # setCookie takes positional arguments, hence the splat (*)
+        await page.setCookie(*cookies)
+
+async def load_cookies(page: Page) -> Optional[str]:
+    """Loads cookies into the page, prioritizing environment variable then file.
+
+    Returns 'env' or 'file' depending on where the cookies came from, or None
+    if none were loaded.
+    """
     # Priority 1: Environment Variable (INSTAGRAM_SESSION_COOKIES)
     if INSTAGRAM_SESSION_COOKIES:
         Logger.info('Attempting to load cookies from INSTAGRAM_SESSION_COOKIES env var.')
-        try:
-            # The env var must contain a valid JSON string representing a list of cookies.
-            cookies = json.loads(INSTAGRAM_SESSION_COOKIES)
-            if isinstance(cookies, list):
-                # setCookie takes positional arguments, hence the splat (*)
-                await page.setCookie(*cookies)
-                Logger.info('Cookies loaded successfully from environment variable.')
-                cookies_loaded = True
-            else:
-                Logger.warning('INSTAGRAM_SESSION_COOKIES does not contain a valid JSON list.')
-        except json.JSONDecodeError:
+        # The env var is parsed once in config; None means it was not valid JSON.
+        cookies = INSTAGRAM_SESSION_COOKIES_PARSED
+        if cookies is None:
             Logger.error('Failed to parse JSON from INSTAGRAM_SESSION_COOKIES.')
-        except Exception as e:
-            # Catch other potential errors during setCookie
-            Logger.error(f'Error setting cookies from environment variable: {str(e)}')
+        elif isinstance(cookies, list):
+            try:
+                await _set_cookies(page, cookies)
+                Logger.info('Cookies loaded successfully from environment variable.')
+                return 'env'
+            except Exception as e:
+                # Catch other potential errors during setCookie
+                Logger.error(f'Error setting cookies from environment variable: {str(e)}')
+        else:
+            Logger.warning('INSTAGRAM_SESSION_COOKIES does not contain a valid JSON list.')
 
     # Priority 2: File (if not loaded from env var)
-    if not cookies_loaded:
-        cookies_path = Path(COOKIES_FILENAME)
-        Logger.info(f'Attempting to load cookies from file: {cookies_path}')
-        try:
-            if not cookies_path.exists():
-                Logger.info(f'Cookies file not found: {cookies_path}')
-                return False # Return False explicitly if file doesn't exist
-
-            with open(cookies_path, 'r') as f:
-                cookies = json.load(f)
-            # Ensure cookies from file are also a list before setting
-            if isinstance(cookies, list):
-                await page.setCookie(*cookies)
-                Logger.info(f'Cookies loaded successfully from {cookies_path}.')
-                cookies_loaded = True
-            else:
-                Logger.warning(f'Cookies file {cookies_path} does not contain a valid JSON list.')
-        except json.JSONDecodeError:
-            Logger.error(f'Failed to parse JSON from cookies file: {cookies_path}')
-        except Exception as e:
-            Logger.error(f'Error loading/setting cookies from file: {str(e)}')
+    cookies_path = Path(COOKIES_FILENAME)
+    Logger.info(f'Attempting to load cookies from file: {cookies_path}')
+    try:
+        if not cookies_path.exists():
+            Logger.info(f'Cookies file not found: {cookies_path}')
+            return None # Return None explicitly if file doesn't exist
+        # A stat is enough to rule out a long-expired session before parsing anything.
+        age_s = saved_cookies_age_s()
+        if age_s is not None and age_s > COOKIES_MAX_AGE_S:
+            Logger.info(f'Cookies file {cookies_path} is {age_s / 86400:.0f} days old; ignoring it.')
+            return None
+
+        with open(cookies_path, 'r') as f:
+            cookies = json.load(f)
+        # Ensure cookies from file are also a list before setting
+        if isinstance(cookies, list):
+            await _set_cookies(page, cookies)
+            Logger.info(f'Cookies loaded successfully from {cookies_path}.')
+            return 'file'
+        else:
+            Logger.warning(f'Cookies file {cookies_path} does not contain a valid JSON list.')
+    except json.JSONDecodeError:
+        Logger.error(f'Failed to parse JSON from cookies file: {cookies_path}')
+    except Exception as e:
+        Logger.error(f'Error loading/setting cookies from file: {str(e)}')
+
+    return None
 
-    return cookies_loaded
+def discard_saved_cookies() -> None:
+    """Deletes the cookies file so the next run can't trust a session that stopped working."""
+    try:
+        Path(COOKIES_FILENAME).unlink(missing_ok=True)
+        Logger.info(f'Removed stale cookies file {COOKIES_FILENAME}; the next run will log in again.')
+    except OSError as e:
+        Logger.error(f'Could not remove cookies file {COOKIES_FILENAME}: {e}')
+
+# Selectors are brittle and may need frequent updates.
+# Combine text-based XPath and potential CSS selectors.
+NOT_NOW_SELECTORS = [
+    "//button[contains(text(), 'Not Now')]", # Common text
+    "//div[@role='dialog']//button[contains(., 'Not Now')]", # More specific within a dialog
+    "button._a9--._a9_1" # Example CSS class selector observed previously (HIGHLY LIKELY TO CHANGE)
+]
+NOT_NOW_TIMEOUT_MS = 2500 # Popups appear quickly if they appear at all
+# True once the clicked button has been removed, i.e. its popup has closed
+_CLICKED_GONE_JS = "() => !(window.__igscraperClicked && window.__igscraperClicked.isConnected)"
+
+# Polls the DOM in-page for any of the selectors and clicks the first match.
+# Resolves to the matching selector, or null once the timeout elapses.
+_CLICK_NOT_NOW_JS = """(selectors, timeoutMs) => new Promise(resolve => {
+    const find = () => {
+        for (const sel of selectors) {
+            const el = sel.startsWith('//')
+                ? document.evaluate(sel, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue
+                : document.querySelector(sel);
+            if (el) { el.click(); window.__igscraperClicked = el; return sel; }
+        }
+        return null;
+    };
+    const deadline = Date.now() + timeoutMs;
+    const tick = () => {
+        const hit = find();
+        if (hit || Date.now() >= deadline) { resolve(hit); return; }
+        setTimeout(tick, 100);
+    };
+    tick();
+})"""
 
 async def try_click_not_now(page: Page) -> bool:
     """Attempts to find and click common 'Not Now' buttons after login.
     
     Handles potential popups like "Save Login Info?" or "Turn on Notifications?".
-    Iterates through known selectors (XPath and CSS) as these popups change.
+    All known selectors (XPath and CSS) are checked in a single in-page poll
+    sharing one timeout, rather than waiting on each selector in turn.
     """
-    # Selectors are brittle and may need frequent updates.
-    # Combine text-based XPath and potential CSS selectors.
-    not_now_selectors = [
-        "//button[contains(text(), 'Not Now')]", # Common text
-        "//div[@role='dialog']//button[contains(., 'Not Now')]", # More specific within a dialog
-        "button._a9--._a9_1" # Example CSS class selector observed previously (HIGHLY LIKELY TO CHANGE)
-    ]
-    clicked_any = False
-    for selector in not_now_selectors:
-        try:
-            # Use appropriate waitFor function based on selector type
-            if selector.startswith("//"):
-                 # Use a short timeout as these popups appear quickly if they do
-                 button = await page.waitForXPath(selector, { 'timeout': 2500 }) 
-            else:
-                 button = await page.waitForSelector(selector, { 'timeout': 2500 })
-            
-            if button:
-                await asyncio.sleep(random.uniform(0.3, 0.8)) # Small delay before click
-                await button.click()
-                Logger.info(f"Clicked 'Not Now' button using selector: {selector}")
-                await asyncio.sleep(random.uniform(1.0, 1.5)) # Wait for action to complete
-                clicked_any = True
-                # Depending on UI, multiple popups might appear.
-                # Option 1: return True immediately after first click
-                # Option 2: continue loop to potentially catch a second popup
-                # Current implementation continues the loop.
-        except Exception:
-            # It's normal for selectors not to be found if the popup didn't appear.
-            # Silently ignore TimeoutError or other exceptions here.
-            pass 
-            
-    if not clicked_any:
+    try:
+        # Bound the whole evaluation in case the page context hangs.
+        selector = await asyncio.wait_for(
+            page.evaluate(_CLICK_NOT_NOW_JS, NOT_NOW_SELECTORS, NOT_NOW_TIMEOUT_MS),
+            timeout=NOT_NOW_TIMEOUT_MS / 1000 + 1
+        )
+    except Exception:
+        # It's normal for nothing to be found if the popup didn't appear.
+        selector = None
+
+    if not selector:
         Logger.info("No common 'Not Now' popups found or clicked.")
-        
-    return clicked_any # Return True if any button was clicked 
\ No newline at end of file
+        return False
+
+    Logger.info(f"Clicked 'Not Now' button using selector: {selector}")
+    try:
+        # Wait for the popup to close rather than sleeping a fixed interval.
+        await page.waitForFunction(_CLICKED_GONE_JS, {'timeout': NOT_NOW_TIMEOUT_MS})
+    except Exception:
+        pass # Dialog lingered; the next step doesn't depend on it being gone
+    # Callers check again to catch a potential second popup.
+    return True
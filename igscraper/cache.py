@@ -0,0 +1,71 @@
+# igscraper/cache.py
+# Provides an on-disk cache of scraped reel details, keyed by shortcode.
+
+import sqlite3
+import time
+from typing import Dict
+
+from igscraper.logger import Logger
+from igscraper.config import REEL_CACHE_DB, REEL_CACHE_TTL_S, REEL_CACHE_COMMIT_EVERY
+
+_SCHEMA = '''CREATE TABLE IF NOT EXISTS reels (
+    shortcode TEXT PRIMARY KEY,
+    url TEXT,
+    caption TEXT,
+    date TEXT,
+    scraped_at REAL
+)'''
+
+class ReelCache:
+    """Remembers reel details between runs so unchanged reels aren't re-visited.
+
+    Writes are committed in batches of `commit_every`; call `close()` to flush
+    the remainder.
+    """
+
+    def __init__(self, path: str = REEL_CACHE_DB, ttl_s: float = REEL_CACHE_TTL_S,
+                 commit_every: int = REEL_CACHE_COMMIT_EVERY):
+        """Opens (or creates) the cache database.
+
+        Args:
+            path: SQLite database file.
+            ttl_s: Entries older than this many seconds are treated as missing.
+            commit_every: Number of writes batched into one transaction.
+        """
+        self.ttl_s = ttl_s
+        self.commit_every = commit_every
+        self._pending = 0
+        self._conn = sqlite3.connect(path)
+        self._conn.execute(_SCHEMA)
+        self._conn.commit()
+
+    def fresh(self) -> Dict[str, Dict]:
+        """Returns every entry newer than the TTL as reel detail dicts keyed by shortcode."""
+        rows = self._conn.execute(
+            'SELECT shortcode, url, caption, date FROM reels WHERE scraped_at > ?',
+            (time.time() - self.ttl_s,)
+        )
+        return {
+            shortcode: {"shortcode": shortcode, "url": url, "is_video": True, "type": "Reel",
+                        "date": date, "caption": caption}
+            for shortcode, url, caption, date in rows
+        }
+
+    def put(self, details: Dict) -> None:
+        """Stores (or refreshes) the details of one scraped reel."""
+        self._conn.execute(
+            'INSERT OR REPLACE INTO reels (shortcode, url, caption, date, scraped_at) VALUES (?, ?, ?, ?, ?)',
+            (details["shortcode"], details["url"], details["caption"], details["date"], time.time())
+        )
+        self._pending += 1
+        if self._pending >= self.commit_every:
+            self._conn.commit()
+            self._pending = 0
+
+    def close(self) -> None:
+        """Commits pending writes and closes the database."""
+        try:
+            self._conn.commit()
+            self._conn.close()
+        except sqlite3.Error as e:
+            Logger.error(f'Error closing reel cache: {e}')
@@ -1,6 +1,7 @@
 # igscraper/config.py
 # Handles configuration loading, constants, and credential management.
 
+import json
 import os
 from pathlib import Path
 from dotenv import load_dotenv
@@ -22,11 +23,37 @@ INSTAGRAM_BASE_URL = 'https://www.instagram.com/'
 # Delays & Timeouts
 SHORT_DELAY_MS = 2000  # General purpose short delay in milliseconds
 EXPLICIT_WAIT_TIMEOUT_S = 20  # Max time in seconds for pyppeteer waits (e.g., waitForSelector)
+LOGIN_MAX_ATTEMPTS = 5  # Login attempts before giving up on transient failures (timeouts, 429/5xx)
+LOGIN_CHECK_TTL_S = 60  # How long a positive login status check is reused without re-navigating
+COOKIES_MAX_AGE_S = 30 * 24 * 3600  # Saved cookie files older than this are treated as expired
+SAVED_SESSION_TRUST_S = 6 * 3600  # Cookies saved this recently skip the startup login-check navigation
+
+# Network
+# Resource types aborted via request interception; the scraper only needs markup,
+# JSON-LD and XHR data. Reel video streams are by far the largest of these.
+# Stylesheets are still loaded so layout-driven infinite scroll keeps working.
+BLOCKED_RESOURCE_TYPES = frozenset({'image', 'media', 'font'})
+
+# Concurrency
+ACCOUNT_CONCURRENCY = 2  # Accounts scraped at once, each with its own profile tab
+REEL_DETAIL_WORKERS = 3  # Browser tabs scraping reel detail pages in parallel (each keeps its own delays)
+PAGE_MAX_USES = 50  # Pooled tabs are replaced after this many reel pages...
+PAGE_MAX_AGE_S = 300  # ...or after this many seconds, to cap renderer memory growth
+INSTAGRAM_REQUESTS_PER_S = 0.5  # Page navigations per second across all tabs combined
+INSTAGRAM_BURST = 2  # Navigations allowed back-to-back before the rate applies
+RATE_LIMIT_COOLDOWN_S = 60  # How long the halved rate is held after an HTTP 429
 
 # Filenames
 COOKIES_FILENAME = 'instagram_cookies.json' # File to store session cookies
 RESULTS_FILENAME = 'reels_results.json' # File to store final scraped data
+PROGRESS_DIR = 'scraped_data' # Per-account JSON Lines files written as reels are scraped (used to resume)
+REEL_CACHE_DB = 'reels_cache.db' # SQLite cache of reel details shared across runs
+REEL_CACHE_TTL_S = 7 * 24 * 3600 # Cached reels newer than this are not re-scraped
+REEL_CACHE_COMMIT_EVERY = 20 # Cache writes batched per transaction
 SCREENSHOTS_DIR = 'screenshots' # Directory to store error screenshots
+# Viewport-only JPEG screenshots: far smaller and cheaper to encode than full PNGs
+SCREENSHOT_OPTIONS = {'type': 'jpeg', 'quality': 60, 'fullPage': False}
+MAX_ERROR_SCREENSHOTS = 10 # Reel detail error screenshots saved per run; later failures are only logged
 
 # --- Environment Variables --- 
 # Fetched from the environment (or .env file) when the module is loaded.
@@ -34,8 +61,15 @@ INSTAGRAM_USERNAME = os.getenv('INSTAGRAM_USERNAME')
 INSTAGRAM_PASSWORD = os.getenv('INSTAGRAM_PASSWORD')
 # Optional session cookies can be provided via env var as a JSON string
 INSTAGRAM_SESSION_COOKIES = os.getenv('INSTAGRAM_SESSION_COOKIES')
+# Parsed once at load time; None if unset or not valid JSON.
+try:
+    INSTAGRAM_SESSION_COOKIES_PARSED = json.loads(INSTAGRAM_SESSION_COOKIES) if INSTAGRAM_SESSION_COOKIES else None
+except json.JSONDecodeError:
+    INSTAGRAM_SESSION_COOKIES_PARSED = None
 # Optional: Path to a file containing proxy servers (one per line, e.g., http://host:port)
 PROXY_LIST_FILE = os.getenv('PROXY_LIST_FILE')
+# Optional: Set to 1/true to save screenshots on expected failures (e.g., rejected login)
+DEBUG_SCREENSHOTS = os.getenv('DEBUG_SCREENSHOTS', '').lower() in ('1', 'true', 'yes')
 
 # --- Utility Functions ---
 def check_credentials() -> bool:
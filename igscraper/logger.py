@@ -1,22 +1,40 @@
 # igscraper/logger.py
 # Provides a basic console logger.
 
+import atexit
+import logging
+import queue
+import sys
+from logging.handlers import QueueHandler, QueueListener
+
+# Log records are queued on the calling thread and written to the console by a
+# background listener, so the scraping hot path never blocks on stdout.
+_log_queue: queue.Queue = queue.Queue(-1)
+_console_handler = logging.StreamHandler(sys.stdout) # stdout, like the original print-based logger
+_console_handler.setFormatter(logging.Formatter('[%(levelname)s] %(message)s'))
+_listener = QueueListener(_log_queue, _console_handler, respect_handler_level=True)
+_listener.start()
+atexit.register(_listener.stop) # Flush queued records on interpreter exit
+
+_logger = logging.getLogger('igscraper')
+_logger.setLevel(logging.INFO)
+_logger.addHandler(QueueHandler(_log_queue))
+_logger.propagate = False
+
 class Logger:
     """Simple static logger class for formatted console output."""
     # Using static methods as the logger doesn't need instance state.
     @staticmethod
     def info(msg: str) -> None:
         """Logs an informational message."""
-        print(f"[INFO] {msg}")
-    
+        _logger.info(msg)
+
     @staticmethod
     def error(msg: str) -> None:
         """Logs an error message."""
-        print(f"[ERROR] {msg}")
-    
+        _logger.error(msg)
+
     @staticmethod
     def warning(msg: str) -> None:
         """Logs a warning message."""
-        print(f"[WARNING] {msg}")
-
-# Add __init__.py to make it a package 
\ No newline at end of file
+        _logger.warning(msg)
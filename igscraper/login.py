@@ -3,35 +3,156 @@
 
 import asyncio
 import random
+import re
 import time # Import time for timestamp
 from pathlib import Path # Import Path
+from typing import Optional, Tuple
+from pyppeteer.errors import NetworkError, TimeoutError as PyppeteerTimeoutError
 from pyppeteer.page import Page
 
 from igscraper.logger import Logger
 from igscraper.config import (
     LOGIN_URL,
     INSTAGRAM_BASE_URL,
-    SHORT_DELAY_MS,
     EXPLICIT_WAIT_TIMEOUT_S,
-    SCREENSHOTS_DIR # Import screenshot dir
+    LOGIN_CHECK_TTL_S,
+    SAVED_SESSION_TRUST_S,
+    LOGIN_MAX_ATTEMPTS,
+    SCREENSHOTS_DIR, # Import screenshot dir
+    SCREENSHOT_OPTIONS,
+    DEBUG_SCREENSHOTS
 )
 # Import save_cookies specifically needed for successful login
-from igscraper.browser import save_cookies 
+from igscraper.browser import (
+    save_cookies,
+    saved_cookies_age_s,
+    wait_for_page_ready
+)
+
+# Text that indicates a 2FA / security-check screen. The pattern is matched in-page
+# against document.body.innerText so the HTML never has to be shipped to Python.
+_2FA_INDICATORS_RE = re.compile(
+    r'two-factor authentication|2-factor authentication|verification code|security code|enter the code',
+    re.I
+)
+
+# Single in-page 2FA probe: checks for the code input and the indicator text in one round-trip.
+_2FA_DETECT_JS = """(pattern) => ({
+    hasInput: !!document.querySelector('input[name="verificationCode"]'),
+    hasText: new RegExp(pattern, 'i').test(document.body ? document.body.innerText : '')
+})"""
+_2FA_TEXT_JS = """(pattern) => new RegExp(pattern, 'i').test(document.body ? document.body.innerText : '')"""
+
+# Selectors used across the login flow (brittle; update here when Instagram changes markup).
+_USERNAME_SEL = 'input[name="username"]'
+_PASSWORD_SEL = 'input[name="password"]'
+_SUBMIT_SEL = 'button[type="submit"]'
+_LOGIN_ERROR_SEL = '#slfErrorAlert, p[data-testid="login-error-message"]' # Combine known error selectors
+_LOGGED_IN_SEL = 'svg[aria-label="Home"], a[href*="/direct/inbox/"]'
+_2FA_INPUT_SEL = 'input[name="verificationCode"], input[aria-label*="Security Code" i]'
+
+# Fills the 2FA code and clicks the confirm button in-page. The value is set through
+# the native setter so React's controlled input registers the change.
+_2FA_SUBMIT_JS = """(inputSel, code) => {
+    const input = document.querySelector(inputSel);
+    if (!input) return {error: `Could not find the 2FA input field using selector: ${inputSel}`};
+    const setValue = Object.getOwnPropertyDescriptor(HTMLInputElement.prototype, 'value').set;
+    input.focus();
+    setValue.call(input, code);
+    input.dispatchEvent(new Event('input', {bubbles: true}));
+    input.dispatchEvent(new Event('change', {bubbles: true}));
+    const button = [...document.querySelectorAll('button')]
+        .find(b => /confirm|submit|next/i.test(b.textContent));
+    if (!button) return {error: 'Could not find the 2FA confirmation button (Confirm/Submit/Next).'};
+    button.click();
+    return {error: null};
+}"""
+# pyppeteer's errors for an evaluate whose page navigated away before it returned
+_CONTEXT_DESTROYED_RE = re.compile(r'Execution context was destroyed|Cannot find context with specified id')
+# Per-field keystroke delay range; real typists average well under 100 ms per key.
+_TYPING_DELAY_MS = (30, 80)
+_PRE_SUBMIT_JITTER_S = (0.3, 0.6)
 
-async def check_login_status(page: Page) -> bool:
+# Post-submit snapshot polled by login_instagram.
+_LOGIN_STATE_JS = """(errorSel, loggedInSel, twoFactorPattern) => {
+    const err = document.querySelector(errorSel);
+    const text = document.body ? document.body.innerText : '';
+    return {
+        url: location.href,
+        errorText: err ? err.textContent.trim() : null,
+        has2FA: !!document.querySelector('input[name="verificationCode"]')
+            || new RegExp(twoFactorPattern, 'i').test(text),
+        loggedIn: !!document.querySelector(loggedInSel)
+    };
+}"""
+_LOGIN_POLL_INTERVAL_S = 0.2
+_LOGIN_OFF_PAGE_GRACE_S = 5 # After leaving /accounts/login, how long to wait for a logged-in marker before checking the URL
+_2FA_POLL_MS = 500 # If the 2FA screen rendered, it is in the DOM well within this window
+_2FA_POLL_INTERVAL_S = 0.1
+
+# Resolved once; created up front so a missing directory can't make a screenshot
+# save fail and mask the error being captured.
+_SCREENSHOTS_DIR = Path(SCREENSHOTS_DIR)
+try:
+    _SCREENSHOTS_DIR.mkdir(parents=True, exist_ok=True)
+except OSError:
+    pass # Reported by main.py, which also tries to create it
+
+# Result of the last full (navigating) login check: (time.monotonic(), logged_in).
+_last_check: Optional[Tuple[float, bool]] = None
+
+async def _has_fresh_session_cookie(page: Page) -> bool:
+    """Returns True if the page holds a non-expired `sessionid` cookie (no navigation needed)."""
+    now = time.time()
+    for cookie in await page.cookies(INSTAGRAM_BASE_URL):
+        if cookie.get('name') == 'sessionid':
+            # Session cookies (no expiry) report expires == -1.
+            expires = cookie.get('expires', -1)
+            return expires == -1 or expires > now
+    return False
+
+async def check_login_status(page: Page, trust_saved_file: bool = False) -> bool:
     """Checks if a login session is active by navigating to the base URL
     and looking for indicators of the login page.
+
+    The navigation is skipped while the page holds a fresh `sessionid` cookie and
+    either a positive check ran within LOGIN_CHECK_TTL_S seconds or the cookies
+    file was saved (after a login or a successful run) within SAVED_SESSION_TRUST_S.
+
+    Args:
+        page: The page whose session is checked.
+        trust_saved_file: Whether the page's cookies were loaded from the cookies
+                          file. Only then does the file's age say anything about them.
     """
+    global _last_check
+    recent_check = _last_check and _last_check[1] and time.monotonic() - _last_check[0] < LOGIN_CHECK_TTL_S
+    saved_age_s = saved_cookies_age_s() if trust_saved_file else None
+    recent_save = saved_age_s is not None and saved_age_s < SAVED_SESSION_TRUST_S
+    if recent_check or recent_save:
+        try:
+            if await _has_fresh_session_cookie(page):
+                Logger.info('Session was verified recently and sessionid cookie is fresh. Assuming logged in.')
+                return True
+        except Exception as e:
+            Logger.warning(f'Could not read cookies for cached login check: {e}')
+
+    result = await _check_login_status_on_page(page)
+    _last_check = (time.monotonic(), result)
+    return result
+
+async def _check_login_status_on_page(page: Page) -> bool:
+    """Performs the full login check by navigating to the base URL."""
     try:
         Logger.info('Checking login status by navigating to Instagram base URL...')
-        # Navigate to the main page, wait for network activity to settle.
-        await page.goto(INSTAGRAM_BASE_URL, {'waitUntil': 'networkidle0'})
-        # Add a small explicit delay just in case networkidle0 fires too early.
-        await asyncio.sleep(SHORT_DELAY_MS / 1000)
+        # Navigate to the main page, then wait for either the login form or the
+        # logged-in home icon (or a brief network-idle window) instead of networkidle0,
+        # which Instagram's background XHR traffic keeps from firing promptly.
+        await page.goto(INSTAGRAM_BASE_URL, {'waitUntil': 'load'})
+        await wait_for_page_ready(page, f'{_USERNAME_SEL}, svg[aria-label="Home"]')
 
         # Simple heuristic: If the username input field (characteristic of login page) exists,
         # assume we are NOT logged in.
-        login_form_username = await page.querySelector('input[name="username"]')
+        login_form_username = await page.querySelector(_USERNAME_SEL)
         if login_form_username:
             Logger.info('Login page username field found. Assuming NOT logged in.')
             return False
@@ -50,26 +171,32 @@ async def handle_2fa(page: Page) -> bool:
     """Detects and handles the 2-Factor Authentication input prompt."""
     try:
         Logger.info('Checking for 2FA prompt...')
-        # Wait briefly to allow the 2FA screen to potentially load after login attempt.
-        await asyncio.sleep(SHORT_DELAY_MS / 1000)
+        # No upfront sleep: the caller has already waited for the submit request to
+        # settle, and the probe below polls briefly for late rendering.
 
         is_2fa_screen = False
-        # First, try to quickly find the specific input field for the code.
-        # Use a short timeout because if it's there, it should appear relatively fast.
         try:
-            await page.waitForSelector('input[name="verificationCode"]', { 'timeout': 3000 })
-            Logger.info('Detected 2FA screen via input field [name="verificationCode"].')
-            is_2fa_screen = True
+            # Poll briefly for the code input field (or 2FA text as a fallback in case
+            # the input field selector changes); one evaluate per poll covers both.
+            loop = asyncio.get_event_loop()
+            deadline = loop.time() + _2FA_POLL_MS / 1000
+            while True:
+                probe = await page.evaluate(_2FA_DETECT_JS, _2FA_INDICATORS_RE.pattern)
+                if probe['hasInput']:
+                    Logger.info('Detected 2FA screen via input field [name="verificationCode"].')
+                    is_2fa_screen = True
+                    break
+                if loop.time() >= deadline:
+                    if probe['hasText']:
+                        Logger.info('Detected 2FA screen via text content.')
+                        is_2fa_screen = True
+                    break
+                await asyncio.sleep(_2FA_POLL_INTERVAL_S)
         except Exception:
-            # If specific input field not found quickly, check page content for 2FA-related text.
-            # This is a fallback in case the input field selector changes.
-            Logger.info('2FA input field not immediately found, checking page content for keywords...')
-            page_content = await page.content()
-            security_indicators = [
-                'two-factor authentication', '2-factor authentication',
-                'verification code', 'security code', 'enter the code'
-            ]
-            if any(indicator.lower() in page_content.lower() for indicator in security_indicators):
+            # The in-page probe can fail if the page navigates mid-check.
+            # Re-check just the page text in-page; only a boolean crosses the CDP pipe.
+            Logger.info('In-page 2FA check failed, checking page text for keywords...')
+            if await page.evaluate(_2FA_TEXT_JS, _2FA_INDICATORS_RE.pattern):
                  Logger.info('Detected 2FA screen via text content.')
                  is_2fa_screen = True
 
@@ -84,29 +211,23 @@ async def handle_2fa(page: Page) -> bool:
                 Logger.error("Cannot get 2FA code from input (EOFError). Login cannot proceed.")
                 return False
 
-            # Find the input field again (might use a broader selector)
-            input_selector = 'input[name="verificationCode"], input[aria-label*="Security Code" i]'
-            input_field = await page.querySelector(input_selector)
-            if not input_field:
-                 Logger.error(f'Could not find the 2FA input field using selector: {input_selector}')
+            # Fill the code and click the confirmation button in one round-trip.
+            try:
+                result = await page.evaluate(_2FA_SUBMIT_JS, _2FA_INPUT_SEL, security_code.strip())
+            except NetworkError as submit_err:
+                if not _CONTEXT_DESTROYED_RE.search(str(submit_err)):
+                    raise
+                # The click went through and the form navigated before the result came
+                # back; login_instagram's status poll decides whether the code was accepted.
+                Logger.info('Page navigated while submitting the 2FA code.')
+                result = {'error': None}
+            if result.get('error'):
+                 Logger.error(result['error'])
                  return False
-            
-            await input_field.type(security_code, { 'delay': random.randint(80, 180) })
             Logger.info('Entered verification code.')
-
-            # Find and click the confirmation button.
-            confirm_selector = 'button:has-text("Confirm"), button:has-text("Submit"), button:has-text("Next")'
-            confirm_button = await page.querySelector(confirm_selector)
-            if not confirm_button:
-                 Logger.error(f'Could not find the 2FA confirmation button using selector: {confirm_selector}')
-                 return False
-                 
-            await confirm_button.click()
             Logger.info('Clicked 2FA confirmation button. Waiting for verification...')
-            # Wait longer after submitting 2FA code.
-            await asyncio.sleep(SHORT_DELAY_MS / 1000 * 2.5)
             # Assume success if code submission didn't immediately error out.
-            # Further verification happens in the main login function after navigation.
+            # No fixed wait: login_instagram keeps polling the page state until it settles.
             return True
         else:
             # If no 2FA indicators were found.
@@ -117,100 +238,139 @@ async def handle_2fa(page: Page) -> bool:
         Logger.error(f'Error during 2FA handling: {str(e)}')
         return False
 
+class _TransientLoginError(Exception):
+    """Raised inside a login attempt for failures worth retrying (timeouts, 429/5xx)."""
+
 async def login_instagram(page: Page, username: str, password: str) -> bool:
-    """Performs the login process on Instagram, including handling 2FA."""
+    """Performs the login process on Instagram, including handling 2FA.
+
+    Transient failures (navigation/selector timeouts, network errors, HTTP 429/5xx
+    on the login page) are retried up to LOGIN_MAX_ATTEMPTS times with full-jitter
+    exponential backoff. Rejected credentials and 2FA failures are not retried.
+    """
+    for attempt in range(1, LOGIN_MAX_ATTEMPTS + 1):
+        try:
+            return await _login_attempt(page, username, password)
+        except _TransientLoginError as e:
+            if attempt == LOGIN_MAX_ATTEMPTS:
+                Logger.error(f'Login failed after {attempt} attempts. Last error: {e}')
+                return False
+            delay = min(60, 0.5 * 2 ** attempt) + random.uniform(0, 0.5)
+            Logger.warning(f'Login attempt {attempt}/{LOGIN_MAX_ATTEMPTS} failed transiently: {e}. Retrying in {delay:.1f}s...')
+            try:
+                # Reset page state before the next attempt
+                await page.goto('about:blank')
+            except Exception:
+                pass
+            await asyncio.sleep(delay)
+    return False
+
+async def _login_attempt(page: Page, username: str, password: str) -> bool:
+    """Runs a single login attempt. Raises _TransientLoginError if it should be retried."""
     try:
         Logger.info(f'Navigating to login page: {LOGIN_URL}')
-        await page.goto(LOGIN_URL, {'waitUntil': 'networkidle0'})
-        # Short delay after page load
-        await asyncio.sleep(SHORT_DELAY_MS / 1000)
+        response = await page.goto(LOGIN_URL, {'waitUntil': 'load'})
+        if response and (response.status == 429 or response.status >= 500):
+            raise _TransientLoginError(f'Login page returned HTTP {response.status}')
+        await wait_for_page_ready(page, _USERNAME_SEL)
 
         Logger.info('Entering login credentials...')
         # Convert timeout from seconds (config) to milliseconds (pyppeteer)
         timeout_ms = EXPLICIT_WAIT_TIMEOUT_S * 1000
         
         # Wait for username field and type username
-        await page.waitForSelector('input[name="username"]', { 'timeout': timeout_ms })
-        # Add random delay to typing to mimic human behavior
-        await page.type('input[name="username"]', username, { 'delay': random.randint(50, 150) })
-        await asyncio.sleep(random.uniform(0.5, 1.0))
-
-        # Type password
-        await page.type('input[name="password"]', password, { 'delay': random.randint(50, 150) })
-        await asyncio.sleep(random.uniform(0.7, 1.2))
+        await page.waitForSelector(_USERNAME_SEL, { 'timeout': timeout_ms })
+        # Add random delay to typing to mimic human behavior.
+        # The fields are typed one after the other: page.type drives a single shared
+        # keyboard/focus, so typing both concurrently would interleave keystrokes.
+        await page.type(_USERNAME_SEL, username, { 'delay': random.randint(*_TYPING_DELAY_MS) })
+        await page.type(_PASSWORD_SEL, password, { 'delay': random.randint(*_TYPING_DELAY_MS) })
+        # Single human-like pause before submitting (anti-bot jitter)
+        await asyncio.sleep(random.uniform(*_PRE_SUBMIT_JITTER_S))
 
         # Find and click login button
-        login_button = await page.waitForSelector('button[type="submit"]', { 'timeout': timeout_ms })
+        login_button = await page.waitForSelector(_SUBMIT_SEL, { 'timeout': timeout_ms })
         await login_button.click()
         Logger.info('Login button clicked. Waiting...')
-        # Wait after click for page to potentially react (redirect, show error, show 2FA)
-        await asyncio.sleep(SHORT_DELAY_MS / 1000 * 2)
-
-        # Check for immediate login failure message (before potential 2FA screen)
-        error_selector = '#slfErrorAlert, p[data-testid="login-error-message"]' # Combine known error selectors
-        error_message = await page.querySelector(error_selector)
-        if error_message:
-             # Try to get the error text content
-             err_text = await page.evaluate('(element) => element.textContent', error_message)
-             Logger.error(f'Login failed with immediate error message: {err_text.strip()}')
-             return False
-
-        # Proceed to handle 2FA if required
-        if not await handle_2fa(page):
-            Logger.error('Login failed due to 2FA handling error.')
-            return False 
 
         # --- Verify Login Success --- 
-        Logger.info('Checking login status after submission/2FA...')
-        try:
-            # Wait for navigation to complete after login/2FA actions.
-            # Use a longer timeout here as redirects can take time.
-            await page.waitForNavigation({'waitUntil': 'networkidle0', 'timeout': timeout_ms * 2})
-        except Exception as nav_err:
-            # Sometimes navigation doesn't register correctly, or page hangs.
-            # Don't fail immediately, check URL and key elements anyway.
-             Logger.warning(f'waitForNavigation timed out or failed after login attempt: {nav_err}. Checking URL/elements...')
-             await asyncio.sleep(SHORT_DELAY_MS / 1000) # Wait a bit more
+        # Poll a single in-page snapshot (URL, error text, 2FA prompt, logged-in markers)
+        # instead of separate querySelector/waitForNavigation/waitForSelector round-trips.
+        # Use a longer deadline here as redirects can take time.
+        loop = asyncio.get_event_loop()
+        deadline = loop.time() + timeout_ms * 2 / 1000
+        handled_2fa = False
+        left_login_at = None # When the snapshot URL first moved off /accounts/login
+        while loop.time() < deadline:
+            try:
+                state = await page.evaluate(
+                    _LOGIN_STATE_JS, _LOGIN_ERROR_SEL, _LOGGED_IN_SEL, _2FA_INDICATORS_RE.pattern
+                )
+            except Exception:
+                # The execution context is destroyed while the login redirect is in flight.
+                await asyncio.sleep(_LOGIN_POLL_INTERVAL_S)
+                continue
+
+            if state['errorText']:
+                 Logger.error(f'Login failed with immediate error message: {state["errorText"]}')
+                 return False
+            if state['loggedIn']:
+                 Logger.info(f'Verified login via presence of Home/Inbox icon: {state["url"]}')
+                 await save_cookies(page) # Save cookies on successful login
+                 return True
+            if state['has2FA'] and not handled_2fa:
+                handled_2fa = True
+                if not await handle_2fa(page):
+                    Logger.error('Login failed due to 2FA handling error.')
+                    return False
+                Logger.info('Checking login status after 2FA...')
+                # Waiting on the user's code shouldn't eat into the verification window.
+                deadline = loop.time() + timeout_ms * 2 / 1000
+                left_login_at = None
+                continue
+            if '/accounts/login' not in state['url']:
+                # Redirected somewhere without a Home/Inbox marker (e.g. /challenge/ or a
+                # new landing page): give it a short grace period, then let the URL check decide.
+                if left_login_at is None:
+                    left_login_at = loop.time()
+                elif loop.time() - left_login_at >= _LOGIN_OFF_PAGE_GRACE_S:
+                    break
+            await asyncio.sleep(_LOGIN_POLL_INTERVAL_S)
 
         current_url = page.url
         # Check if URL indicates successful login (on main domain, not login/challenge page)
         is_url_ok = 'instagram.com' in current_url and 'login' not in current_url and 'challenge' not in current_url
         
         if is_url_ok:
-            Logger.info(f'Login successful based on URL: {current_url}')
-            try:
-                 # As a final check, look for a common element present only when logged in.
-                 # Use a short timeout for this verification step.
-                 await page.waitForSelector('svg[aria-label="Home"], a[href*="/direct/inbox/"]', { 'timeout': 5000 })
-                 Logger.info('Verified login via presence of Home/Inbox icon.')
-                 await save_cookies(page) # Save cookies on successful login
-                 return True
-            except Exception:
-                 # If the element isn't found quickly, but URL looks good, 
-                 # warn but assume success (could be a new UI element).
-                 Logger.warning('Login URL okay, but key logged-in element not found quickly. Assuming success.')
-                 await save_cookies(page)
-                 return True
+            # If the element wasn't found in time, but URL looks good, 
+            # warn but assume success (could be a new UI element).
+            Logger.warning(f'Login URL okay ({current_url}), but key logged-in element not found. Assuming success.')
+            await save_cookies(page)
+            return True
         else:
              # If URL still looks like login/challenge page.
              Logger.error(f'Login failed. Final URL indicates failure: {current_url}')
-             # Capture final state for debugging
-             try: 
-                 timestamp = time.strftime("%Y%m%d_%H%M%S")
-                 ss_path = Path(SCREENSHOTS_DIR) / f'login_final_url_fail_{timestamp}.png'
-                 await page.screenshot({'path': str(ss_path)}) 
-                 Logger.info(f"Saved login failure screenshot to: {ss_path}")
-             except Exception as ss_err:
-                  Logger.error(f"Failed to save login failure screenshot: {ss_err}")
+             # Capture final state for debugging (opt-in via DEBUG_SCREENSHOTS)
+             if DEBUG_SCREENSHOTS:
+                 try: 
+                     ss_path = _SCREENSHOTS_DIR / f'login_final_url_fail_{int(time.time())}.jpg'
+                     await page.screenshot({'path': str(ss_path), **SCREENSHOT_OPTIONS}) 
+                     Logger.info(f"Saved login failure screenshot to: {ss_path}")
+                 except Exception as ss_err:
+                      Logger.error(f"Failed to save login failure screenshot: {ss_err}")
              return False
 
+    except _TransientLoginError:
+        raise
+    except (PyppeteerTimeoutError, NetworkError) as e:
+        # Timeouts and dropped connections are usually transient; let the caller retry.
+        raise _TransientLoginError(str(e)) from e
     except Exception as e:
         Logger.error(f'Unexpected error during login process: {str(e)}')
         # Capture state on unexpected error
         try: 
-            timestamp = time.strftime("%Y%m%d_%H%M%S")
-            ss_path = Path(SCREENSHOTS_DIR) / f'login_unexpected_error_{timestamp}.png'
-            await page.screenshot({'path': str(ss_path)}) 
+            ss_path = _SCREENSHOTS_DIR / f'login_unexpected_error_{int(time.time())}.jpg'
+            await page.screenshot({'path': str(ss_path), **SCREENSHOT_OPTIONS}) 
             Logger.info(f"Saved login error screenshot to: {ss_path}")
         except Exception as ss_err:
              Logger.error(f"Failed to save login error screenshot: {ss_err}")
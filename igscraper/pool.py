@@ -0,0 +1,81 @@
+# igscraper/pool.py
+# Provides a fixed-size pool of browser pages that are recycled over time.
+
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from pyppeteer.page import Page
+from typing import AsyncIterator, Awaitable, Callable
+
+from igscraper.logger import Logger
+from igscraper.config import PAGE_MAX_USES, PAGE_MAX_AGE_S
+
+class _PooledPage:
+    """A pooled page plus the bookkeeping needed to decide when to recycle it."""
+
+    def __init__(self, page: Page):
+        self.page = page
+        self.created_at = time.monotonic()
+        self.uses = 0
+
+class PagePool:
+    """Hands out pre-opened pages and replaces them after `max_uses` navigations
+    or `max_age_s` seconds, so a long run doesn't accumulate renderer memory."""
+
+    def __init__(self, page_factory: Callable[[], Awaitable[Page]], size: int,
+                 max_uses: int = PAGE_MAX_USES, max_age_s: float = PAGE_MAX_AGE_S):
+        """Initializes the pool (call `start()` before use).
+
+        Args:
+            page_factory: Coroutine function returning a new, fully configured page.
+            size: Number of pages kept open.
+            max_uses: Recycle a page after this many acquisitions.
+            max_age_s: Recycle a page once it is older than this many seconds.
+        """
+        self.size = size
+        self.max_uses = max_uses
+        self.max_age_s = max_age_s
+        self._page_factory = page_factory
+        self._free: asyncio.Queue = asyncio.Queue()
+
+    async def start(self) -> None:
+        """Opens all pages up front so they are warm when scraping starts."""
+        for _ in range(self.size):
+            self._free.put_nowait(_PooledPage(await self._page_factory()))
+        Logger.info(f"Page pool started with {self.size} pages.")
+
+    @asynccontextmanager
+    async def acquire(self) -> AsyncIterator[Page]:
+        """Waits for a free page and returns it to the pool (recycled if due) on exit."""
+        entry = await self._free.get()
+        try:
+            yield entry.page
+        finally:
+            entry.uses += 1
+            if entry.uses >= self.max_uses or time.monotonic() - entry.created_at >= self.max_age_s:
+                entry = await self._recycle(entry)
+            self._free.put_nowait(entry)
+
+    async def _recycle(self, entry: _PooledPage) -> _PooledPage:
+        """Replaces a page with a fresh one; keeps the old page if that fails."""
+        try:
+            fresh = _PooledPage(await self._page_factory())
+        except Exception as e:
+            Logger.warning(f"Could not open replacement page, reusing the old one: {e}")
+            entry.uses = 0
+            entry.created_at = time.monotonic()
+            return entry
+        try:
+            await entry.page.close()
+        except Exception as e:
+            Logger.warning(f"Error closing recycled page: {e}")
+        return fresh
+
+    async def close(self) -> None:
+        """Closes every page currently in the pool."""
+        while not self._free.empty():
+            entry = self._free.get_nowait()
+            try:
+                await entry.page.close()
+            except Exception as e:
+                Logger.warning(f"Error closing pooled page: {e}")
@@ -1,13 +1,30 @@
 # igscraper/proxy_rotator.py
 # Handles loading and rotating proxies from a file.
 
+import itertools
 import random
-from itertools import cycle
 from pathlib import Path
-from typing import List, Optional, Iterator
+from typing import Dict, Optional, Tuple
 
 from .logger import Logger # Use relative import within the package
 
+# Proxy lists already read from disk, keyed by resolved path: (st_mtime_ns, proxies).
+# Lets multiple rotators share one read of an unchanged file.
+_PROXY_CACHE: Dict[Path, Tuple[int, Tuple[str, ...]]] = {}
+
+def _load_proxies(file_path: Path) -> Tuple[str, ...]:
+    """Returns the proxies listed in file_path, re-reading only if its mtime changed."""
+    resolved = file_path.resolve()
+    mtime_ns = resolved.stat().st_mtime_ns
+    cached = _PROXY_CACHE.get(resolved)
+    if cached and cached[0] == mtime_ns:
+        return cached[1]
+    strip = str.strip
+    # Strip whitespace and filter out empty lines
+    proxies = tuple(p for p in map(strip, resolved.read_text().splitlines()) if p)
+    _PROXY_CACHE[resolved] = (mtime_ns, proxies)
+    return proxies
+
 class ProxyRotator:
     """Loads proxies from a file and provides them in a round-robin fashion."""
 
@@ -18,8 +35,11 @@ class ProxyRotator:
             proxy_file: Path to the file containing proxies (one per line).
                         If None or empty, rotation is disabled.
         """
-        self.proxies: List[str] = []
-        self.proxy_cycler: Optional[Iterator[str]] = None
+        self.proxies: Tuple[str, ...] = () # Immutable once loaded
+        self._n = 0 # len(self.proxies), cached
+        # Monotonic ticket counter; next() on itertools.count is atomic under the GIL,
+        # so concurrent callers each get a distinct ticket without a lock.
+        self._tickets = itertools.count()
         self.enabled = False
 
         if not proxy_file:
@@ -32,39 +52,35 @@ class ProxyRotator:
             return
 
         try:
-            with open(file_path, 'r') as f:
-                # Read lines, strip whitespace, filter out empty lines
-                self.proxies = [line.strip() for line in f if line.strip()]
+            # The list may be shared with other rotators; each keeps its own index.
+            self.proxies = _load_proxies(file_path)
             
             if not self.proxies:
                 Logger.warning(f"Proxy file {file_path} is empty. Proxy rotation disabled.")
                 return
 
-            # Use itertools.cycle for efficient round-robin
-            self.proxy_cycler = cycle(self.proxies)
+            # Start at a random offset instead of shuffling the (shared) list, so
+            # rotators created from the same file don't all begin on the same proxy.
+            self._n = len(self.proxies)
+            self._tickets = itertools.count(random.randrange(self._n))
             self.enabled = True
             Logger.info(f"Initialized proxy rotator with {len(self.proxies)} proxies from {file_path}.")
-            # Optionally shuffle proxies initially?
-            # random.shuffle(self.proxies)
-            # self.proxy_cycler = cycle(self.proxies)
 
         except Exception as e:
             Logger.error(f"Error reading proxy file {file_path}: {e}. Proxy rotation disabled.")
-            self.proxies = []
-            self.proxy_cycler = None
+            self.proxies = ()
+            self._n = 0
             self.enabled = False
 
     def get_next_proxy(self) -> Optional[str]:
-        """Returns the next proxy in the rotation, or None if disabled."""
-        if not self.enabled or not self.proxy_cycler:
+        """Returns the next proxy in the rotation, or None if disabled.
+
+        Safe to call from multiple threads or interleaved asyncio tasks: each call
+        takes exactly one ticket from the shared counter.
+        """
+        if not self.enabled:
             return None
-        
-        try:
-            # Get the next proxy from the cycle
-            next_proxy = next(self.proxy_cycler)
-            # Logger.info(f"Using proxy: {next_proxy}") # Log proxy usage (can be verbose)
-            return next_proxy
-        except StopIteration: # Should not happen with cycle, but as safeguard
-            Logger.error("Proxy cycler unexpectedly stopped.")
-            self.enabled = False
-            return None 
\ No newline at end of file
+
+        proxy = self.proxies[next(self._tickets) % self._n]
+        # Logger.info(f"Using proxy: {proxy}") # Log proxy usage (can be verbose)
+        return proxy
@@ -0,0 +1,68 @@
+# igscraper/ratelimit.py
+# Provides a token-bucket rate limiter shared by all concurrent scraping tabs.
+
+import asyncio
+import time
+from typing import Optional
+
+from igscraper.logger import Logger
+from igscraper.config import INSTAGRAM_REQUESTS_PER_S, INSTAGRAM_BURST, RATE_LIMIT_COOLDOWN_S
+
+class AsyncTokenBucket:
+    """Bounds the combined navigation rate of every worker against one host.
+
+    The rate is halved whenever Instagram pushes back (HTTP 429) and grows back
+    linearly to its configured value once the cool-down window has passed (AIMD).
+    """
+
+    def __init__(self, rate: float = INSTAGRAM_REQUESTS_PER_S, capacity: float = INSTAGRAM_BURST,
+                 cooldown_s: float = RATE_LIMIT_COOLDOWN_S):
+        """Initializes a full bucket.
+
+        Args:
+            rate: Tokens (navigations) added per second.
+            capacity: Maximum burst size.
+            cooldown_s: How long a reduced rate is held after a penalty before recovering.
+        """
+        self.base_rate = rate
+        self.rate = rate
+        self.capacity = capacity
+        self.cooldown_s = cooldown_s
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._cooldown_until = 0.0 # No cool-down (or retry-after pause) in effect
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now: float) -> None:
+        """Adds tokens for the time elapsed and recovers the rate after a cool-down."""
+        elapsed = now - self._updated
+        if self.rate < self.base_rate and now >= self._cooldown_until:
+            # Additive increase: regain the full rate over one cool-down window,
+            # counting only the time since the cool-down ended
+            recovering = now - max(self._updated, self._cooldown_until)
+            self.rate = min(self.base_rate, self.rate + self.base_rate * recovering / self.cooldown_s)
+        self._updated = now
+        self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+
+    async def acquire(self) -> None:
+        """Waits until a token is available and consumes it."""
+        # The lock makes waiters queue up in order instead of racing for each token.
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+    def penalize(self, retry_after_s: Optional[float] = None) -> None:
+        """Halves the rate after a 429 and, if given, drains the bucket for `retry_after_s`."""
+        now = time.monotonic()
+        self._refill(now)
+        self.rate = max(self.base_rate / 16, self.rate / 2) # Multiplicative decrease, floored
+        self._cooldown_until = now + self.cooldown_s
+        if retry_after_s:
+            # Negative tokens hold every worker off until the server's requested pause is over
+            self._tokens = min(self._tokens, -retry_after_s * self.rate)
+        Logger.warning(f'Rate limited: request rate lowered to {self.rate:.2f}/s for {self.cooldown_s:.0f}s.')
@@ -2,29 +2,155 @@
 # Contains the core logic for scraping Instagram Reels.
 
 import asyncio
+import itertools
 import json
 import random
+import re
 import time # Import time for timestamp
+from functools import lru_cache
 from pathlib import Path # Import Path
+from urllib.parse import urlsplit
 from pyppeteer.page import Page
-from typing import List, Dict, Optional
+from contextlib import nullcontext
+from typing import AsyncContextManager, Callable, List, Dict, Optional
+
+try:
+    # orjson parses large JSON-LD blobs several times faster than the stdlib;
+    # it accepts str directly and returns plain dicts/lists.
+    from orjson import loads as _json_loads
+except ImportError: # Optional dependency
+    _json_loads = json.loads
 
 from igscraper.logger import Logger
+from igscraper.browser import goto_with_backoff, wait_for_first
+from igscraper.pool import PagePool
+from igscraper.ratelimit import AsyncTokenBucket
+from igscraper.cache import ReelCache
 from igscraper.config import (
     EXPLICIT_WAIT_TIMEOUT_S,
     SHORT_DELAY_MS,
-    SCREENSHOTS_DIR # Import screenshot dir
+    SCREENSHOTS_DIR, # Import screenshot dir
+    SCREENSHOT_OPTIONS,
+    MAX_ERROR_SCREENSHOTS
 )
 
-async def scrape_reel_details(page: Page, reel_url: str) -> Optional[Dict]:
+_SHORTCODE_RE = re.compile(r'/reel/([^/?#]+)')
+_LOGIN_WALL_URL_RE = re.compile(r'/accounts/login')
+_UNSAFE_FILENAME_RE = re.compile(r'[^A-Za-z0-9_-]+')
+
+@lru_cache(maxsize=4096)
+def _shortcode(reel_url: str) -> str:
+    """Extracts the reel shortcode from a URL like https://www.instagram.com/reel/<code>/."""
+    match = _SHORTCODE_RE.search(reel_url)
+    return match.group(1) if match else ''
+
+# Profile page markers for accounts that have no scrapable reels
+_PRIVATE_ACCOUNT_RE = re.compile(r'This Account is Private', re.I)
+_UNAVAILABLE_PAGE_RE = re.compile(r"Sorry, this page isn.t available|Page Not Found", re.I)
+_PROFILE_TEXT_JS = "() => (document.body ? document.body.innerText : '').slice(0, 2000)"
+# Kept inline (not a preloaded helper) since it runs on whatever page an error left behind
+_ERROR_MARKER_JS = "() => document.title + '\\n' + (document.body ? document.body.innerText : '').slice(0, 1024)"
+
+_SCREENSHOTS_DIR = Path(SCREENSHOTS_DIR)
+_error_screenshot_count = itertools.count() # Reel error screenshots attempted this run
+
+_REEL_LINK_SELECTOR = 'a[href*="/reel/"]'
+_PROFILE_READY_TIMEOUT_MS = 10000 # Upper bound for the reel grid (or a private/missing notice) to render
+# Resolves once the visible text shows a private or missing-account notice
+_PROFILE_NOTICE_JS = "(pattern) => new RegExp(pattern, 'i').test(document.body ? document.body.innerText.slice(0, 2000) : '')"
+_PROFILE_NOTICE_PATTERN = f'{_PRIVATE_ACCOUNT_RE.pattern}|{_UNAVAILABLE_PAGE_RE.pattern}'
+_SCROLL_SETTLE_MS = 300 # DOM quiet time after the grid grows before a scroll step returns
+_SCROLL_STALL_WAIT_MS = 1000 # First wait after a scroll that loaded nothing; doubles per stall
+
+# Scrolls the profile grid once. Reel links (<a> tags whose href contains "/reel/")
+# are collected both before and after the wait, since the grid may unmount rows
+# that scrolled out of view; only links not returned by an earlier step are sent
+# back. The wait ends as soon as the grid has grown and its DOM has been quiet for
+# settleMs; waitMs is only the ceiling for when nothing loads.
+# The already-returned set lives in window.__igscraperSeenLinks and is only reset
+# by a full navigation (a new window), so this relies on scrape_reels opening each
+# profile with page.goto rather than a client-side route change.
+_SCROLL_STEP_JS = """async (waitMs, settleMs) => {
+    const links = () => Array.from(document.querySelectorAll('a[href*="/reel/"]'), a => a.href);
+    const found = new Set(links());
+    const before = document.body.scrollHeight;
+    window.scrollTo(0, before);
+    await new Promise(resolve => {
+        let settle = null;
+        const done = () => { observer.disconnect(); clearTimeout(ceiling); clearTimeout(settle); resolve(); };
+        const ceiling = setTimeout(done, waitMs);
+        const observer = new MutationObserver(() => {
+            if (document.body.scrollHeight > before) {
+                clearTimeout(settle);
+                settle = setTimeout(done, settleMs);
+            }
+        });
+        observer.observe(document.body, {childList: true, subtree: true});
+    });
+    links().forEach(href => found.add(href));
+    // Only hrefs not returned by an earlier step on this document cross CDP.
+    const seen = window.__igscraperSeenLinks || (window.__igscraperSeenLinks = new Set());
+    const fresh = [...found].filter(href => !seen.has(href));
+    fresh.forEach(href => seen.add(href));
+    return {links: fresh, before, height: document.body.scrollHeight};
+}"""
+
+# Selectors MUST be updated based on current Instagram structure.
+_JSONLD_SELECTOR = 'script[type="application/ld+json"]'
+_H1_SELECTOR = 'h1' # Often contains title/caption
+_SPAN_SELECTOR = 'div._a9zs > span[dir="auto"]' # Example specific selector
+_TIME_SELECTOR = 'time[datetime]'
+# Any of these means the reel page has rendered enough to extract from
+_DETAIL_READY_SELECTOR = f'{_JSONLD_SELECTOR}, {_TIME_SELECTOR}, {_H1_SELECTOR}'
+_DETAIL_READY_TIMEOUT_MS = 5000
+_DETAIL_DELAY_S = (4, 8) # Per-worker pause between reels when no shared limiter paces them
+_DETAIL_JITTER_S = (0.5, 1.5) # Per-worker pause between reels when a limiter is in use
+
+# Returns the raw values scrape_reel_details needs from a reel page in one round-trip.
+_REEL_SNAPSHOT_JS = """(ldSel, h1Sel, spanSel, timeSel) => {
+    const text = sel => { const el = document.querySelector(sel); return el ? el.textContent : null; };
+    const time = document.querySelector(timeSel);
+    return {
+        ld: text(ldSel),
+        h1: text(h1Sel),
+        span: text(spanSel),
+        time: time ? time.getAttribute('datetime') : null
+    };
+}"""
+
+# The snippets above are installed once per document as window.__igscraper helpers
+# (see install_page_helpers), so per-reel and per-scroll calls only send a short
+# stub over CDP instead of re-shipping and re-compiling the full source each time.
+# Must be a function expression: pyppeteer's evaluateOnNewDocument runs it as `(src)()`.
+_PAGE_HELPERS_JS = f"""() => {{
+    window.__igscraper = {{
+        profileText: {_PROFILE_TEXT_JS},
+        scrollStep: {_SCROLL_STEP_JS},
+        reelSnapshot: {_REEL_SNAPSHOT_JS}
+    }};
+}}"""
+_PROFILE_TEXT_CALL_JS = "() => window.__igscraper.profileText()"
+_SCROLL_STEP_CALL_JS = "(waitMs, settleMs) => window.__igscraper.scrollStep(waitMs, settleMs)"
+_REEL_SNAPSHOT_CALL_JS = "(...sels) => window.__igscraper.reelSnapshot(...sels)"
+
+async def install_page_helpers(page: Page) -> None:
+    """Registers the scraper's in-page helpers on every document `page` loads.
+
+    Must be called before the page navigates to Instagram.
+    """
+    await page.evaluateOnNewDocument(_PAGE_HELPERS_JS)
+
+async def scrape_reel_details(page: Page, reel_url: str,
+                              limiter: Optional[AsyncTokenBucket] = None) -> Optional[Dict]:
     """Navigates to a single reel URL and extracts detailed metadata.
     
     Prioritizes extracting data from embedded JSON-LD script tags.
     Falls back to scraping specific HTML elements if JSON-LD fails or lacks data.
     Returns a dictionary with details or None if essential data is missing.
+    The navigation waits on `limiter`, if given, so parallel tabs share one rate.
     """
     # Extract shortcode for logging and as part of the data
-    shortcode = reel_url.split("/reel/")[-1].split("/")[0]
+    shortcode = _shortcode(reel_url)
     Logger.info(f"  Scraping details for reel: {shortcode} ({reel_url})")
     details = {
         "shortcode": shortcode,
@@ -38,25 +164,30 @@ async def scrape_reel_details(page: Page, reel_url: str) -> Optional[Dict]:
     try:
         # Navigate to the individual reel page
         timeout_ms = EXPLICIT_WAIT_TIMEOUT_S * 1000 # Convert s to ms
-        # Use a slightly longer timeout for individual reel pages as they can be heavy
-        await page.goto(reel_url, {'waitUntil': 'networkidle0', 'timeout': timeout_ms * 1.5}) 
-        # Wait after load for potentially dynamic content rendering (caption/date)
-        await asyncio.sleep(random.uniform(2.0, 4.0))
+        # JSON-LD ships in the initial HTML, so DOMContentLoaded is enough; networkidle0
+        # is held open by Instagram's beacons and long-polling.
+        await goto_with_backoff(page, reel_url, {'waitUntil': 'domcontentloaded', 'timeout': timeout_ms},
+                                limiter=limiter)
+        try:
+            await page.waitForSelector(_DETAIL_READY_SELECTOR, {'timeout': _DETAIL_READY_TIMEOUT_MS})
+        except Exception:
+            # Nothing rendered yet; give dynamic content (caption/date) extra time.
+            await asyncio.sleep(random.uniform(2.0, 4.0))
+
+        # Read every candidate source (JSON-LD text, caption elements, <time> attribute)
+        # in one in-page call instead of a querySelector + evaluate round-trip per field.
+        snapshot = await page.evaluate(_REEL_SNAPSHOT_CALL_JS, _JSONLD_SELECTOR, _H1_SELECTOR, _SPAN_SELECTOR, _TIME_SELECTOR)
 
         # --- Method 1: Attempt to extract from embedded JSON-LD --- 
         # This is generally more reliable than HTML selectors if available.
         extracted_from_json = False
         try:
-            # Find the script tag containing JSON-LD data.
-            json_ld_selector = 'script[type="application/ld+json"]'
-            json_ld_element = await page.querySelector(json_ld_selector)
+            json_ld_content = snapshot['ld']
             
-            if json_ld_element:
+            if json_ld_content:
                 Logger.info(f"    Found JSON-LD script tag for {shortcode}.")
-                # Extract the text content of the script tag.
-                json_ld_content = await page.evaluate('(element) => element.textContent', json_ld_element)
                 # Parse the text content as JSON.
-                data = json.loads(json_ld_content)
+                data = _json_loads(json_ld_content)
                 
                 # JSON-LD data might be wrapped in a list.
                 if isinstance(data, list): data = data[0]
@@ -79,7 +210,7 @@ async def scrape_reel_details(page: Page, reel_url: str) -> Optional[Dict]:
                 else:
                     Logger.warning(f"    JSON-LD found but type mismatch or not a dictionary: {data.get('@type', 'N/A')}")
             else:
-                Logger.info(f"    JSON-LD script tag not found using selector: {json_ld_selector}")
+                Logger.info(f"    JSON-LD script tag not found using selector: {_JSONLD_SELECTOR}")
             
             # Placeholder: Could add attempts here to find other JSON blobs 
             # (e.g., in window.__sharedData or similar patterns if JSON-LD fails)
@@ -89,46 +220,37 @@ async def scrape_reel_details(page: Page, reel_url: str) -> Optional[Dict]:
             Logger.warning(f"    Error processing JSON-LD for {shortcode}: {json_err}")
             extracted_from_json = False
 
+        # Fast path: JSON-LD gave us everything, so skip the HTML fallback entirely.
+        if details["caption"] and details["date"]:
+            Logger.info(f"    JSON-LD complete for {shortcode}.")
+            return details
+
         # --- Method 2: Fallback to HTML scraping if JSON failed or missed data --- 
+        # Uses the element values already captured in the snapshot.
         if not details["caption"] or not details["date"]:
             Logger.info(f"    Attempting HTML scraping for missing details ({shortcode}).")
-            try:
-                # Scrape Caption via HTML (if not found in JSON)
-                if not details["caption"]:
-                    # Strategy: Try H1 first, then fallback to more specific (brittle) selectors.
-                    # Selectors MUST be updated based on current Instagram structure.
-                    h1_selector = 'h1' # Often contains title/caption
-                    span_selector = 'div._a9zs > span[dir="auto"]' # Example specific selector
-                    
-                    caption_el = await page.querySelector(h1_selector)
-                    if caption_el:
-                        details["caption"] = await page.evaluate('(el) => el.textContent', caption_el)
-                        Logger.info(f"      Extracted caption via HTML ({h1_selector}).")
-                    else:
-                        # Try the more specific selector if H1 fails
-                        caption_el = await page.querySelector(span_selector)
-                        if caption_el:
-                             details["caption"] = await page.evaluate('(el) => el.textContent', caption_el)
-                             Logger.info(f"      Extracted caption via HTML ({span_selector}).")
-                
+            # Scrape Caption via HTML (if not found in JSON)
+            if not details["caption"]:
+                # Strategy: Try H1 first, then fallback to more specific (brittle) selectors.
+                if snapshot['h1']:
+                    details["caption"] = snapshot['h1']
+                    Logger.info(f"      Extracted caption via HTML ({_H1_SELECTOR}).")
+                elif snapshot['span']:
+                    # Try the more specific selector if H1 fails
+                    details["caption"] = snapshot['span']
+                    Logger.info(f"      Extracted caption via HTML ({_SPAN_SELECTOR}).")
+                else:
                     # Log if caption still not found after HTML attempts
-                    if not details["caption"]:
-                         Logger.warning(f"    Could not find caption via HTML scraping for {shortcode}.")
-
-                # Scrape Date via HTML (if not found in JSON)
-                if not details["date"]:
-                    # The <time> tag with a datetime attribute is usually the most reliable.
-                    time_selector = 'time[datetime]'
-                    time_el = await page.querySelector(time_selector)
-                    if time_el:
-                        details["date"] = await page.evaluate('(el) => el.getAttribute("datetime")', time_el)
-                        Logger.info(f"      Extracted date via HTML ({time_selector}): {details['date']}")
-                    else:
-                        Logger.warning(f"    Could not find time element via HTML ({time_selector}) for {shortcode}.")
-                         
-            except Exception as html_err:
-                # Catch errors during the HTML scraping attempt.
-                Logger.error(f"    Error during HTML scraping for {shortcode}: {html_err}")
+                    Logger.warning(f"    Could not find caption via HTML scraping for {shortcode}.")
+
+            # Scrape Date via HTML (if not found in JSON)
+            if not details["date"]:
+                # The <time> tag with a datetime attribute is usually the most reliable.
+                if snapshot['time']:
+                    details["date"] = snapshot['time']
+                    Logger.info(f"      Extracted date via HTML ({_TIME_SELECTOR}): {details['date']}")
+                else:
+                    Logger.warning(f"    Could not find time element via HTML ({_TIME_SELECTOR}) for {shortcode}.")
         
         # --- Final Validation & Return --- 
         # Check if we have the essential shortcode and at least one piece of metadata.
@@ -144,102 +266,227 @@ async def scrape_reel_details(page: Page, reel_url: str) -> Optional[Dict]:
         # Catch major errors during navigation or overall processing for this reel.
         Logger.error(f"  Major error scraping details page for {reel_url}: {str(e)}")
         # Add screenshotting here for debugging difficult errors.
-        try: 
-            timestamp = time.strftime("%Y%m%d_%H%M%S")
-            # Sanitize shortcode just in case it contains invalid characters for filename
-            safe_shortcode = "".join(c for c in shortcode if c.isalnum() or c in ('_', '-')).rstrip()
-            ss_path = Path(SCREENSHOTS_DIR) / f'error_reel_{safe_shortcode}_{timestamp}.png'
-            await page.screenshot({'path': str(ss_path)}) 
-            Logger.info(f"Saved reel detail error screenshot to: {ss_path}")
-        except Exception as ss_err:
-            Logger.error(f"Failed to save reel detail error screenshot: {ss_err}")
+        # Capped per run so a burst of failures (e.g., a soft block) doesn't flood the disk.
+        if next(_error_screenshot_count) < MAX_ERROR_SCREENSHOTS:
+            try: 
+                timestamp = time.strftime("%Y%m%d_%H%M%S")
+                # Sanitize shortcode just in case it contains invalid characters for filename
+                safe_shortcode = _UNSAFE_FILENAME_RE.sub('', shortcode)
+                ss_path = _SCREENSHOTS_DIR / f'error_reel_{safe_shortcode}_{timestamp}.jpg'
+                await page.screenshot({'path': str(ss_path), **SCREENSHOT_OPTIONS}) 
+                Logger.info(f"Saved reel detail error screenshot to: {ss_path}")
+            except Exception as ss_err:
+                Logger.error(f"Failed to save reel detail error screenshot: {ss_err}")
         return None # Return None on major failure
 
-async def scrape_reels(page: Page, username: str) -> List[Dict]:
+def _read_jsonl(path: Path) -> List[Dict]:
+    """Reads reel records from a JSON Lines file, ignoring a truncated last line."""
+    if not path.exists():
+        return []
+    records = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                records.append(_json_loads(line))
+            except ValueError: # json/orjson JSONDecodeError
+                # A crash mid-write can leave a partial line; it is simply re-scraped.
+                continue
+    return records
+
+class LoginRequiredError(ConnectionError):
+    """Raised when Instagram sends a logged-in navigation to the login page."""
+
+async def scrape_reels(page: Page, username: str, page_pool: Optional[PagePool] = None,
+                       out_path: Optional[Path] = None,
+                       limiter: Optional[AsyncTokenBucket] = None,
+                       cache: Optional[ReelCache] = None) -> Optional[List[Dict]]:
     """Scrapes all reel URLs from a user's profile page by scrolling,
     then iterates through the URLs to scrape detailed metadata for each.
+
+    Returns the scraped reels (empty for private or missing accounts), or None
+    if scraping was interrupted by an error, in which case out_path is kept for
+    the next run to resume from.
+
+    Args:
+        page: Logged-in page used for the profile/scroll phase.
+        username: The account whose reels are scraped.
+        page_pool: Pool of pages for the concurrent detail phase (one worker per
+                   pooled page). If None, details are scraped serially on `page`.
+        out_path: Optional JSON Lines file. Each scraped reel is appended as soon
+                  as it is extracted, and reels already in the file are skipped,
+                  so an interrupted run can resume where it stopped.
+        limiter: Optional rate limiter shared by the profile navigation and every
+                 detail worker, bounding the combined request rate.
+        cache: Optional cross-run cache. Reels with a fresh entry are returned
+               from it without navigating, and newly scraped reels are stored.
+
+    Raises:
+        LoginRequiredError: The profile navigation was redirected to the login
+                            page, i.e. the session is no longer valid.
     """
     reels_data: List[Dict] = [] # Stores the final list of dictionaries
     try:
-        # Navigate to the target user's reels tab.
+        # Navigate to the target user's reels tab. This must stay a full navigation:
+        # it is what clears the scroll step's window.__igscraperSeenLinks.
         target_url = f'https://www.instagram.com/{username}/reels/'
         Logger.info(f'Navigating to user reels page: {target_url}')
-        await page.goto(target_url, {'waitUntil': 'networkidle0'})
-        await asyncio.sleep(SHORT_DELAY_MS / 1000) # Short pause after initial load
+        # DOMContentLoaded, not networkidle0: Instagram's background requests keep the
+        # network busy, so networkidle0 often ran out the full timeout (on every retry).
+        await goto_with_backoff(page, target_url, {'waitUntil': 'domcontentloaded'}, limiter=limiter)
+        if _LOGIN_WALL_URL_RE.search(page.url):
+            # Every later account would land here too; let the caller stop the run.
+            raise LoginRequiredError(f'Opening {target_url} redirected to the login page; the session is no longer valid.')
+        # The grid renders after DOMContentLoaded; private or missing profiles show a
+        # notice instead, so only profiles with no reels wait out the timeout.
+        await wait_for_first(
+            page.waitForSelector(_REEL_LINK_SELECTOR, {'timeout': _PROFILE_READY_TIMEOUT_MS}),
+            page.waitForFunction(_PROFILE_NOTICE_JS, {'timeout': _PROFILE_READY_TIMEOUT_MS}, _PROFILE_NOTICE_PATTERN)
+        )
+
+        # Fail fast on private/missing accounts before the scroll and detail phases.
+        # Only the first 2 KB of visible text is pulled from the page.
+        page_text = await page.evaluate(_PROFILE_TEXT_CALL_JS)
+        if _PRIVATE_ACCOUNT_RE.search(page_text):
+            Logger.warning(f'Account {username} appears to be private. Skipping.')
+            return []
+        if _UNAVAILABLE_PAGE_RE.search(page_text):
+            Logger.warning(f'Account {username} page seems unavailable or does not exist. Skipping.')
+            return []
 
         # --- Scroll to Collect All Reel URLs --- 
-        reel_urls: set[str] = set() # Use a set to automatically handle duplicates
-        last_height = await page.evaluate('document.body.scrollHeight')
+        # Keyed by shortcode so /reel/ABC, /reel/ABC/ and /reel/ABC/?igsh=... count once
+        reel_by_code: Dict[str, str] = {}
         attempts = 0 # Track consecutive scrolls that yield no height change
         max_scroll_attempts = 25 # Increased max scrolls slightly
         scroll_count = 0
 
         Logger.info(f'Starting scroll loop to find all reel URLs for {username}...')
         while attempts < 3 and scroll_count < max_scroll_attempts:
-            # Execute JavaScript in the page context to find all reel links.
-            # Looks for <a> tags whose href contains "/reel/"
-            new_urls_on_page = await page.evaluate('''() => {
-                const links = Array.from(document.querySelectorAll('a[href*="/reel/"]'));
-                return links.map(link => link.href);
-            }''')
+            # One round-trip per scroll: collect links, scroll, wait in-page for new
+            # content, then collect again and report the heights.
+            # Upper bound on the wait for new content after the scroll (randomized).
+            # After a step that found nothing, re-scroll sooner with a doubling wait
+            # (1 s, then 2 s) before giving up, instead of repeating the full delay.
+            if attempts == 0:
+                wait_ms = SHORT_DELAY_MS + random.random() * 1500
+            else:
+                wait_ms = _SCROLL_STALL_WAIT_MS << (attempts - 1)
+            step = await page.evaluate(_SCROLL_STEP_CALL_JS, wait_ms, _SCROLL_SETTLE_MS)
+            new_urls_on_page = step['links']
             
-            # Add newly found URLs to the set.
-            original_count = len(reel_urls)
-            reel_urls.update(new_urls_on_page)
-            newly_added_count = len(reel_urls) - original_count
+            # Add newly found reels, keeping the first URL seen per shortcode
+            # (without its query string/fragment).
+            original_count = len(reel_by_code)
+            for url in new_urls_on_page:
+                code = _shortcode(url)
+                if code and code not in reel_by_code:
+                    reel_by_code[code] = urlsplit(url)._replace(query='', fragment='').geturl()
+            newly_added_count = len(reel_by_code) - original_count
             
-            Logger.info(f'Scroll {scroll_count+1}/{max_scroll_attempts}: Found {len(new_urls_on_page)} links on screen, added {newly_added_count} new. Total unique URLs: {len(reel_urls)}')
-
-            # Scroll down the page.
-            await page.evaluate('window.scrollTo(0, document.body.scrollHeight);')
-            # Wait for new content to potentially load after scroll.
-            await asyncio.sleep(SHORT_DELAY_MS / 1000 + random.random() * 1.5) # Slightly longer random wait
+            Logger.info(f'Scroll {scroll_count+1}/{max_scroll_attempts}: Got {len(new_urls_on_page)} new hrefs, added {newly_added_count} new reels. Total unique URLs: {len(reel_by_code)}')
             scroll_count += 1
             
             # Check if the page height has changed.
-            new_height = await page.evaluate('document.body.scrollHeight')
-            if new_height == last_height:
+            if step['height'] == step['before']:
                 # If height hasn't changed for 3 consecutive scrolls, assume end of content.
                 attempts += 1
-                Logger.info(f'Scroll height ({new_height}) did not change. Attempt {attempts}/3.')
+                Logger.info(f'Scroll height ({step["height"]}) did not change. Attempt {attempts}/3.')
             else:
                 attempts = 0 # Reset counter if height changed
-            last_height = new_height
             
         if scroll_count >= max_scroll_attempts:
              Logger.warning(f'Reached max scroll attempts ({max_scroll_attempts}) for {username}. May not have found all reels.')
         
-        unique_reel_urls = list(reel_urls)
+        unique_reel_urls = list(reel_by_code.values())
+        found_total = len(unique_reel_urls)
         Logger.info(f'Finished scrolling phase. Found {len(unique_reel_urls)} unique reel URLs for {username}. Now scraping details...')
 
+        # --- Resume from a previous partial run --- 
+        # Reels already recorded in out_path are returned as-is instead of re-scraped.
+        if out_path:
+            saved = _read_jsonl(out_path)
+            if saved:
+                saved_codes = {r.get('shortcode') for r in saved}
+                reels_data.extend(saved)
+                unique_reel_urls = [u for u in unique_reel_urls if _shortcode(u) not in saved_codes]
+                Logger.info(f'Resuming from {out_path}: {len(saved)} reels already saved, {len(unique_reel_urls)} left to scrape.')
+
+        # --- Skip reels scraped recently (by any earlier run) --- 
+        if cache:
+            cached = cache.fresh()
+            remaining = []
+            for reel_url in unique_reel_urls:
+                hit = cached.get(_shortcode(reel_url))
+                if hit:
+                    reels_data.append(hit)
+                else:
+                    remaining.append(reel_url)
+            if len(remaining) < len(unique_reel_urls):
+                Logger.info(f'{len(unique_reel_urls) - len(remaining)} reels served from cache, {len(remaining)} left to scrape.')
+            unique_reel_urls = remaining
+
         # --- Scrape Details for Each Found URL --- 
+        # Each worker pulls URLs from a shared queue and borrows a pooled page per
+        # reel, so up to page_pool.size reels are loaded concurrently.
         total_urls = len(unique_reel_urls)
+        reused = len(reels_data) # Reels taken from out_path or the cache
+        url_queue: asyncio.Queue = asyncio.Queue()
         for i, reel_url in enumerate(unique_reel_urls):
-            Logger.info(f"---> Processing reel {i+1}/{total_urls} for {username}...")
-            # Call the detail scraping function for the current URL.
-            details = await scrape_reel_details(page, reel_url)
-            if details:
-                reels_data.append(details)
-            # Crucial delay between visiting individual reel pages to avoid rate limiting.
-            await asyncio.sleep(random.uniform(4, 8)) # Increased delay range
-
-        Logger.info(f'Finished scraping details for {username}. Successfully extracted data for {len(reels_data)} out of {total_urls} found reels.')
+            url_queue.put_nowait((i, reel_url))
+
+        async def detail_worker(acquire_page: Callable[[], AsyncContextManager[Page]]) -> None:
+            while True:
+                try:
+                    i, reel_url = url_queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                Logger.info(f"---> Processing reel {i+1}/{total_urls} for {username}...")
+                # Call the detail scraping function for the current URL.
+                async with acquire_page() as worker_page:
+                    details = await scrape_reel_details(worker_page, reel_url, limiter)
+                if details:
+                    reels_data.append(details)
+                    if out_file:
+                        # One JSON object per line, flushed so progress survives a crash.
+                        out_file.write(json.dumps(details) + '\n')
+                        out_file.flush()
+                    if cache:
+                        cache.put(details)
+                # Pacing comes from the shared limiter (if any), which adapts to 429s and
+                # login-wall redirects; this is only jitter so workers don't move in lockstep.
+                await asyncio.sleep(random.uniform(*(_DETAIL_JITTER_S if limiter else _DETAIL_DELAY_S)))
+
+        out_file = open(out_path, 'a', encoding='utf-8') if out_path else None
+        try:
+            if page_pool:
+                await asyncio.gather(*(detail_worker(page_pool.acquire) for _ in range(page_pool.size)))
+            else:
+                await detail_worker(lambda: nullcontext(page))
+        finally:
+            if out_file:
+                out_file.close()
+
+        Logger.info(f'Finished scraping details for {username}. Have data for {len(reels_data)} out of {found_total} found reels '
+                    f'({reused} resumed or cached, {len(reels_data) - reused} of {total_urls} remaining newly scraped).')
         return reels_data # Return the list of successfully scraped reel dictionaries
         
+    except LoginRequiredError:
+        raise
     except Exception as e:
         # Catch errors occurring during the process for this specific user.
         Logger.error(f'Error occurred while scraping reels for {username}: {str(e)}')
         try:
-            # Try to get page source for context on error (e.g., private account page)
-            page_content = await page.content()
-            if "This Account is Private" in page_content:
+            # Read the title plus the start of the visible text for context on error
+            # (e.g., private account page) instead of serializing the whole DOM.
+            marker = await page.evaluate(_ERROR_MARKER_JS)
+            if _PRIVATE_ACCOUNT_RE.search(marker):
                 Logger.warning(f'Account {username} appears to be private.')
-            elif "Sorry, this page isn\'t available." in page_content:
+            elif _UNAVAILABLE_PAGE_RE.search(marker):
                 Logger.warning(f'Account {username} page seems unavailable or does not exist.')
             else:
                 # Log snippet if unknown error
-                Logger.warning(f"Page content snippet on error for {username}: {page_content[:500]}...")
+                Logger.warning(f"Page text snippet on error for {username}: {marker[:500]}...")
         except Exception as page_err:
              Logger.error(f'Could not get page content for {username} after error: {page_err}')
              
-        return [] # Return an empty list if scraping failed for this user 
\ No newline at end of file
+        return None # Scraping did not finish for this user; out_path is left to resume from 
\ No newline at end of file
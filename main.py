@@ -6,9 +6,16 @@ import json
 import os
 import time
 import random
-from typing import List, Dict
+from typing import List, Dict, Set, Tuple
 from pathlib import Path
+from pyppeteer.browser import Browser # Import Browser type
 from pyppeteer.network_manager import Request # Import Request type
+from pyppeteer.page import Page # Import Page type
+
+try:
+    import orjson # Optional: serializes the results dump several times faster
+except ImportError:
+    orjson = None
 
 # Import necessary components from the igscraper package
 from igscraper.logger import Logger
@@ -16,13 +23,20 @@ from igscraper.config import (
     INSTAGRAM_USERNAME, # Loaded from .env via config
     INSTAGRAM_PASSWORD, # Loaded from .env via config
     RESULTS_FILENAME,   # Filename for saving results
+    PROGRESS_DIR,       # Directory for per-account JSON Lines progress files
     SCREENSHOTS_DIR,    # Directory for screenshots
+    SCREENSHOT_OPTIONS, # Shared JPEG/viewport screenshot settings
     PROXY_LIST_FILE, # Import proxy file path
+    REEL_DETAIL_WORKERS, # Number of concurrent reel-detail tabs
+    ACCOUNT_CONCURRENCY, # Number of accounts scraped at the same time
     check_credentials   # Utility to validate credentials early
 )
 from igscraper.browser import (
     setup_browser,      # Function to launch the browser
+    configure_page,     # Function to enable resource blocking/interception
     load_cookies,       # Function to load session cookies
+    save_cookies,       # Function to persist session cookies
+    discard_saved_cookies, # Function to drop a cookies file whose session stopped working
     try_click_not_now   # Function to handle post-login popups
 )
 from igscraper.login import (
@@ -30,18 +44,21 @@ from igscraper.login import (
     login_instagram     # Function to perform the login process
 )
 from igscraper.scraper import (
+    install_page_helpers, # Function to preload the scraper's in-page JS helpers
+    LoginRequiredError, # Raised when a profile navigation lands on the login page
     scrape_reels        # Function to scrape reels for a single user
 )
 from igscraper.proxy_rotator import ProxyRotator # Import the rotator
+from igscraper.pool import PagePool # Import the detail-page pool
+from igscraper.ratelimit import AsyncTokenBucket # Import the shared rate limiter
+from igscraper.cache import ReelCache # Import the cross-run reel cache
 
 async def handle_request_interception(request: Request, rotator: ProxyRotator):
-    """Intercepts requests and routes them through the next available proxy."""
-    # Optimization: Optionally ignore interception for non-essential resources
-    # resource_types_to_proxy = {'document', 'script', 'xhr', 'fetch'}
-    # if request.resourceType not in resource_types_to_proxy:
-    #     await request.continue_()
-    #     return
+    """Intercepts requests and routes them through the next available proxy.
 
+    Heavy resource types (BLOCKED_RESOURCE_TYPES) are aborted by configure_page
+    before this handler runs, so they never consume proxy bandwidth.
+    """
     proxy = rotator.get_next_proxy()
     if proxy:
         try:
@@ -67,7 +84,19 @@ async def handle_request_interception(request: Request, rotator: ProxyRotator):
              except Exception:
                  pass # Ignore if abort also fails
 
-async def run_scraper_for_accounts(target_usernames: List[str]) -> Dict[str, List[Dict]]:
+async def open_page(browser: Browser, rotator: ProxyRotator) -> Page:
+    """Opens a new tab with resource blocking, the scraper's JS helpers and, if enabled, proxy rotation."""
+    page = await browser.newPage()
+    # --- Set up Request Interception (resource blocking + proxy rotation) --- 
+    if rotator.enabled:
+        # Pass the rotator through to the handler for every non-blocked request
+        await configure_page(page, lambda req: handle_request_interception(req, rotator))
+    else:
+        await configure_page(page)
+    await install_page_helpers(page)
+    return page
+
+async def run_scraper_for_accounts(target_usernames: List[str]) -> Tuple[Dict[str, List[Dict]], Set[str]]:
     """Initializes the browser, handles login/session, iterates through target
     usernames, orchestrates scraping for each, and handles browser cleanup.
     
@@ -76,13 +105,17 @@ async def run_scraper_for_accounts(target_usernames: List[str]) -> Dict[str, Lis
         
     Returns:
         A dictionary where keys are usernames and values are lists of 
-        scraped reel data dictionaries.
+        scraped reel data dictionaries, and the set of usernames whose
+        scrape finished (the others keep their progress files for resuming).
     """
     browser = None # Initialize browser variable to ensure it's available in finally block
     page = None    # Initialize page variable
     # Use type hint for the results dictionary
     results: Dict[str, List[Dict]] = {}
+    completed: Set[str] = set() # Accounts whose scrape_reels call ran to the end
     rotator = None # Initialize rotator
+    cache = None   # Initialize reel cache
+    page_pool = None # Initialize detail page pool
 
     try:
         # --- Initialization --- 
@@ -99,34 +132,30 @@ async def run_scraper_for_accounts(target_usernames: List[str]) -> Dict[str, Lis
         
         # Initialize the proxy rotator
         rotator = ProxyRotator(PROXY_LIST_FILE)
+        if rotator.enabled:
+            Logger.info("Proxy rotation enabled via request interception.")
+        else:
+            Logger.info("Proxy rotation not enabled. Intercepting requests for resource blocking only.")
         
         # Launch the Pyppeteer browser instance
         browser = await setup_browser()
         # Open a new page (tab) in the browser
-        page = await browser.newPage()
-        
-        # --- Set up Proxy Rotation via Request Interception --- 
-        if rotator and rotator.enabled:
-            Logger.info("Enabling request interception for proxy rotation.")
-            await page.setRequestInterception(True)
-            # Attach the handler using a lambda to pass the rotator instance
-            # Use asyncio.ensure_future to handle the async handler correctly
-            page.on('request', lambda req: asyncio.ensure_future(handle_request_interception(req, rotator)))
-        else:
-             Logger.info("Proxy rotation not enabled. Proceeding without request interception.")
-             # Ensure interception is off if not using proxies
-             await page.setRequestInterception(False)
+        page = await open_page(browser, rotator)
+        # Pooled tabs for concurrent reel-detail scraping; they share the browser's cookies.
+        page_pool = PagePool(lambda: open_page(browser, rotator), REEL_DETAIL_WORKERS)
+        await page_pool.start()
 
         # --- Login/Session Handling --- 
         Logger.info('Initiating login/session check...')
         # Attempt to load cookies first (from env var or file)
-        session_loaded = await load_cookies(page)
+        cookie_source = await load_cookies(page) # 'env', 'file' or None
         is_logged_in = False # Flag to track login status
         
-        if session_loaded:
+        if cookie_source:
             Logger.info('Session cookies were loaded. Verifying if session is active...')
-            # If cookies were loaded, check if they represent an active session
-            is_logged_in = await check_login_status(page)
+            # If cookies were loaded, check if they represent an active session.
+            # The cookies file's age only vouches for cookies that came from that file.
+            is_logged_in = await check_login_status(page, trust_saved_file=cookie_source == 'file')
             if is_logged_in:
                  Logger.info('✓ Session is active.')
             else:
@@ -148,30 +177,92 @@ async def run_scraper_for_accounts(target_usernames: List[str]) -> Dict[str, Lis
         
         # --- Post-Login Popup Handling --- 
         if is_logged_in:
-             Logger.info("Checking for post-login popups (e.g., 'Save Info', 'Notifications')...")
-             # Attempt to click "Not Now" for potential popups. 
-             # It's safe if they don't appear; the function handles that.
-             await try_click_not_now(page)
-             await asyncio.sleep(0.5) # Brief pause between checks
-             await try_click_not_now(page) # Check again for potential second popup
+             # Skipped when the session was trusted from saved cookies without loading
+             # Instagram: there is no page for popups to appear on.
+             if page.url != 'about:blank':
+                 Logger.info("Checking for post-login popups (e.g., 'Save Info', 'Notifications')...")
+                 # Attempt to click "Not Now" for potential popups. 
+                 # It's safe if they don't appear; the function handles that.
+                 await try_click_not_now(page)
+                 await try_click_not_now(page) # Check again for potential second popup
         else:
              # Safety check: If somehow not logged in after all attempts, abort.
              Logger.error("Critical error: Not logged in after checks/attempts. Aborting scraping.")
              # Return empty results dictionary
-             return results 
+             return results, completed
 
         # --- Account Iteration & Scraping --- 
         Logger.info("Starting scraping process for target accounts...")
-        for target_username in target_usernames:
-            Logger.info(f'---> Processing account: {target_username}')
-            # Call the main scraping function for the current user
-            # Pass the existing, logged-in page object
-            reels_list = await scrape_reels(page, target_username) 
-            # Store the results (list of reel dicts) in the main results dict
-            results[target_username] = reels_list
-            Logger.info(f'---> Finished processing for {target_username}. Found {len(reels_list)} reels with details.')
-            # Add a polite delay between scraping different accounts
-            await asyncio.sleep(random.uniform(2.5, 5.5))
+        progress_dir = Path(PROGRESS_DIR)
+        progress_dir.mkdir(parents=True, exist_ok=True)
+        # One limiter for every tab so adding workers doesn't multiply the request rate
+        limiter = AsyncTokenBucket()
+        cache = ReelCache()
+        # Accounts are scraped concurrently by ACCOUNT_CONCURRENCY workers. Each worker
+        # keeps one tab for the profile/scroll phase across all of its accounts; the
+        # tabs share the browser's login cookies, the detail page pool, the limiter
+        # and the cache.
+        # dict.fromkeys drops duplicate usernames so no two workers share a progress file
+        unique_usernames = list(dict.fromkeys(target_usernames))
+        account_queue: asyncio.Queue = asyncio.Queue()
+        for target_username in unique_usernames:
+            account_queue.put_nowait(target_username)
+        account_results: Dict[str, List[Dict]] = {}
+        session_lost = asyncio.Event() # Set once a profile navigation lands on the login page
+
+        async def account_worker(account_page: Page) -> None:
+            while True:
+                try:
+                    target_username = account_queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                Logger.info(f'---> Processing account: {target_username}')
+                try:
+                    # Stream each reel to a per-account JSON Lines file so a crashed run can resume
+                    progress_path = progress_dir / f'reels_{target_username}.jsonl'
+                    reels_list = await scrape_reels(account_page, target_username, page_pool, progress_path, limiter, cache)
+                    if reels_list is None:
+                        # Interrupted: record no reels, but keep the progress file to resume from
+                        reels_list = []
+                    else:
+                        completed.add(target_username)
+                    # Store the results (list of reel dicts) for this account
+                    account_results[target_username] = reels_list
+                    Logger.info(f'---> Finished processing for {target_username}. Found {len(reels_list)} reels with details.')
+                    # Drop the previous profile's DOM before the next account
+                    await account_page.goto('about:blank')
+                except LoginRequiredError as login_err:
+                    Logger.error(f'{login_err} Stopping; the remaining accounts are left for the next run.')
+                    session_lost.set()
+                    # Empty the queue so the other workers stop after their current account
+                    while not account_queue.empty():
+                        account_queue.get_nowait()
+                    return
+                except Exception as account_err:
+                    Logger.error(f'Error scraping account {target_username}: {account_err}')
+                # Add a polite delay before this worker picks up the next account
+                await asyncio.sleep(random.uniform(2.5, 5.5))
+
+        # The first worker reuses the logged-in page; the rest open one tab each, once.
+        account_pages = [page]
+        for _ in range(min(ACCOUNT_CONCURRENCY, len(unique_usernames)) - 1):
+            account_pages.append(await open_page(browser, rotator))
+        await asyncio.gather(*(account_worker(p) for p in account_pages))
+        for extra_page in account_pages[1:]:
+            await extra_page.close()
+        # Keep the results in input order
+        for target_username in unique_usernames:
+            if target_username in account_results:
+                results[target_username] = account_results[target_username]
+
+        if session_lost.is_set():
+            # The session was revoked (or soft-blocked) mid-run; don't let the next run
+            # trust the saved cookies without logging in again.
+            discard_saved_cookies()
+        elif any(results.values()):
+            # Reels came back, so the session is known good: refresh the cookies file (and
+            # its mtime) so the next run can skip the login check navigation.
+            await save_cookies(page)
 
     except Exception as e:
         Logger.error(f'An error occurred during the main scraping process: {str(e)}')
@@ -179,13 +270,17 @@ async def run_scraper_for_accounts(target_usernames: List[str]) -> Dict[str, Lis
         if page:
             try: 
                 timestamp = time.strftime("%Y%m%d_%H%M%S")
-                ss_path = Path(SCREENSHOTS_DIR) / f'run_scraper_error_{timestamp}.png'
-                await page.screenshot({'path': str(ss_path)}) 
+                ss_path = Path(SCREENSHOTS_DIR) / f'run_scraper_error_{timestamp}.jpg'
+                await page.screenshot({'path': str(ss_path), **SCREENSHOT_OPTIONS}) 
                 Logger.info(f"Saved error screenshot to: {ss_path}")
             except Exception as ss_err: 
                 Logger.error(f"Failed to save error screenshot: {ss_err}")
     finally:
         # --- Cleanup --- 
+        if cache:
+            cache.close() # Flush batched cache writes
+        if page_pool:
+            await page_pool.close() # Close the pooled detail tabs before the browser
         # Ensure the browser is closed regardless of success or failure.
         if browser:
             try:
@@ -197,7 +292,7 @@ async def run_scraper_for_accounts(target_usernames: List[str]) -> Dict[str, Lis
                  Logger.error(f'Error closing browser: {close_err}')
 
     # Return the dictionary containing results for all processed accounts.
-    return results
+    return results, completed
 
 async def main():
     """Main asynchronous function to set up and run the scraper."""
@@ -221,10 +316,11 @@ async def main():
     # --- Execute Scraping --- 
     start_time = time.time()
     scraped_data = {}
+    completed = set()
     try:
         # Call the main orchestration function.
         # This handles browser setup, login, iteration, and cleanup.
-        scraped_data = await run_scraper_for_accounts(target_usernames)
+        scraped_data, completed = await run_scraper_for_accounts(target_usernames)
     except ValueError as cred_err:
         # Catch credential validation errors from check_credentials()
         Logger.error(f"Configuration Error: {cred_err}")
@@ -248,9 +344,16 @@ async def main():
         try:
             # Write the results dictionary to a JSON file.
             # indent=2 makes the output file human-readable.
-            with open(RESULTS_FILENAME, 'w') as f:
-                json.dump(scraped_data, f, indent=2)
+            if orjson:
+                with open(RESULTS_FILENAME, 'wb') as f:
+                    f.write(orjson.dumps(scraped_data, option=orjson.OPT_INDENT_2))
+            else:
+                with open(RESULTS_FILENAME, 'w') as f:
+                    json.dump(scraped_data, f, indent=2)
             Logger.info(f'✓ Results successfully saved to {RESULTS_FILENAME}')
+            # Progress files are only needed to resume an unfinished scrape; finished reels live in the cache too.
+            for username in completed:
+                (Path(PROGRESS_DIR) / f'reels_{username}.jsonl').unlink(missing_ok=True)
         except Exception as e:
              Logger.error(f'Failed to save results to {RESULTS_FILENAME}: {str(e)}')
     else:
@@ -0,0 +1,129 @@
+# tests/test_browser.py
+# Tests for the browser helpers that don't need a running browser.
+
+import asyncio
+import gc
+from types import SimpleNamespace
+
+import pytest
+from pyppeteer.errors import TimeoutError as PyppeteerTimeoutError
+
+from igscraper import browser
+from igscraper.browser import goto_with_backoff, wait_for_first
+
+def _finished(loop, error=None):
+    future = loop.create_future()
+    if error:
+        future.set_exception(error)
+    else:
+        future.set_result(None)
+    return future
+
+def test_wait_for_first_true_if_any_succeeds():
+    async def run():
+        loop = asyncio.get_running_loop()
+        return await wait_for_first(_finished(loop, RuntimeError('boom')), _finished(loop))
+    assert asyncio.run(run())
+
+def test_wait_for_first_false_if_all_fail():
+    async def run():
+        loop = asyncio.get_running_loop()
+        return await wait_for_first(_finished(loop, RuntimeError('a')), _finished(loop, RuntimeError('b')))
+    assert not asyncio.run(run())
+
+def test_wait_for_first_retrieves_every_exception():
+    reported = []
+
+    async def run():
+        loop = asyncio.get_running_loop()
+        loop.set_exception_handler(lambda loop, context: reported.append(context))
+        futures = [_finished(loop)] + [_finished(loop, RuntimeError(str(i))) for i in range(8)]
+        assert await wait_for_first(*futures)
+        del futures
+        gc.collect() # Unretrieved exceptions are reported when the future is collected
+
+    asyncio.run(run())
+    assert reported == []
+
+class _Response:
+    def __init__(self, status, headers=None):
+        self.status = status
+        self.headers = headers or {}
+
+class _FakePage:
+    """Plays back one outcome per goto: an exception to raise, or (response, landing URL)."""
+
+    def __init__(self, *outcomes):
+        self.outcomes = list(outcomes)
+        self.url = 'about:blank'
+        self.gotos = 0
+
+    async def goto(self, url, options):
+        self.gotos += 1
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        response, self.url = outcome
+        return response
+
+class _RecordingLimiter:
+    """Stands in for AsyncTokenBucket: never waits, records every penalty."""
+
+    def __init__(self):
+        self.penalties = []
+
+    async def acquire(self):
+        pass
+
+    def penalize(self, retry_after_s=None):
+        self.penalties.append(retry_after_s)
+
+@pytest.fixture
+def delays(monkeypatch):
+    """Records goto_with_backoff's backoff sleeps instead of waiting them out."""
+    recorded = []
+
+    async def no_sleep(delay):
+        recorded.append(delay)
+
+    monkeypatch.setattr(browser, 'asyncio', SimpleNamespace(sleep=no_sleep))
+    return recorded
+
+URL = 'https://www.instagram.com/nasa/reels/'
+
+def test_goto_retries_timeouts_then_succeeds(delays):
+    ok = _Response(200)
+    page = _FakePage(PyppeteerTimeoutError('slow'), PyppeteerTimeoutError('slow'), (ok, URL))
+    assert asyncio.run(goto_with_backoff(page, URL, base=2)) is ok
+    assert page.gotos == 3
+    assert len(delays) == 2 and 2 <= delays[1] < 3 # base ** attempt plus up to 1 s of jitter
+
+def test_goto_reraises_the_last_failure(delays):
+    page = _FakePage(*[PyppeteerTimeoutError('slow')] * 3)
+    with pytest.raises(PyppeteerTimeoutError):
+        asyncio.run(goto_with_backoff(page, URL, tries=3))
+    assert page.gotos == 3
+
+def test_goto_returns_the_last_5xx_response(delays):
+    page = _FakePage((_Response(503), URL), (_Response(503), URL))
+    assert asyncio.run(goto_with_backoff(page, URL, tries=2)).status == 503
+    assert len(delays) == 1
+
+def test_goto_429_honors_retry_after_and_penalizes_limiter(delays):
+    limiter = _RecordingLimiter()
+    ok = _Response(200)
+    page = _FakePage((_Response(429, {'retry-after': '7'}), URL), (ok, URL))
+    assert asyncio.run(goto_with_backoff(page, URL, limiter=limiter)) is ok
+    assert delays[0] >= 7
+    assert limiter.penalties == [7.0]
+
+def test_goto_login_redirect_penalizes_limiter_without_retrying(delays):
+    limiter = _RecordingLimiter()
+    page = _FakePage((_Response(200), 'https://www.instagram.com/accounts/login/?next=/nasa/'))
+    asyncio.run(goto_with_backoff(page, URL, limiter=limiter))
+    assert page.gotos == 1 and delays == []
+    assert limiter.penalties == [None]
+
+def test_goto_without_attempts_raises():
+    with pytest.raises(ValueError):
+        asyncio.run(goto_with_backoff(_FakePage(), URL, tries=0))
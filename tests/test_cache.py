@@ -0,0 +1,28 @@
+# tests/test_cache.py
+# Tests for the on-disk reel cache.
+
+from igscraper.cache import ReelCache
+
+REEL = {"shortcode": "ABC", "url": "https://www.instagram.com/reel/ABC/", "is_video": True,
+        "type": "Reel", "date": "2024-01-01T00:00:00.000Z", "caption": "hi"}
+
+def test_put_then_fresh_returns_the_reel(tmp_path):
+    cache = ReelCache(str(tmp_path / 'cache.db'), ttl_s=3600, commit_every=1)
+    cache.put(REEL)
+    assert cache.fresh() == {"ABC": REEL}
+    cache.close()
+
+def test_entries_older_than_ttl_are_missing(tmp_path):
+    cache = ReelCache(str(tmp_path / 'cache.db'), ttl_s=0)
+    cache.put(REEL)
+    assert cache.fresh() == {}
+    cache.close()
+
+def test_batched_writes_survive_close(tmp_path):
+    path = str(tmp_path / 'cache.db')
+    cache = ReelCache(path, ttl_s=3600, commit_every=100)
+    cache.put(REEL)
+    cache.close() # Flushes the uncommitted batch
+    reopened = ReelCache(path, ttl_s=3600)
+    assert "ABC" in reopened.fresh()
+    reopened.close()
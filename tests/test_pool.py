@@ -0,0 +1,75 @@
+# tests/test_pool.py
+# Tests for the recycling page pool.
+
+import asyncio
+
+from igscraper.pool import PagePool
+
+class _FakePage:
+    def __init__(self, number):
+        self.number = number
+        self.closed = False
+
+    async def close(self):
+        self.closed = True
+
+class _Factory:
+    """Page factory that numbers its pages and can be told to fail."""
+
+    def __init__(self):
+        self.pages = []
+        self.fail = False
+
+    async def __call__(self):
+        if self.fail:
+            raise RuntimeError('browser gone')
+        page = _FakePage(len(self.pages))
+        self.pages.append(page)
+        return page
+
+async def _use(pool):
+    async with pool.acquire() as page:
+        return page
+
+def test_page_is_recycled_after_max_uses():
+    async def run():
+        factory = _Factory()
+        pool = PagePool(factory, size=1, max_uses=2, max_age_s=3600)
+        await pool.start()
+        used = [await _use(pool) for _ in range(3)]
+        return factory, used
+
+    factory, used = asyncio.run(run())
+    assert [p.number for p in used] == [0, 0, 1]
+    assert factory.pages[0].closed and not factory.pages[1].closed
+
+def test_page_is_recycled_after_max_age():
+    async def run():
+        factory = _Factory()
+        pool = PagePool(factory, size=1, max_uses=100, max_age_s=0)
+        await pool.start()
+        return [await _use(pool) for _ in range(2)]
+
+    assert [p.number for p in asyncio.run(run())] == [0, 1]
+
+def test_failed_replacement_keeps_the_old_page():
+    async def run():
+        factory = _Factory()
+        pool = PagePool(factory, size=1, max_uses=1, max_age_s=3600)
+        await pool.start()
+        factory.fail = True
+        return [await _use(pool) for _ in range(2)]
+
+    used = asyncio.run(run())
+    assert [p.number for p in used] == [0, 0]
+    assert not used[0].closed
+
+def test_close_closes_every_free_page():
+    async def run():
+        factory = _Factory()
+        pool = PagePool(factory, size=3)
+        await pool.start()
+        await pool.close()
+        return factory.pages
+
+    assert all(p.closed for p in asyncio.run(run()))
@@ -0,0 +1,43 @@
+# tests/test_ratelimit.py
+# Tests for the shared token-bucket rate limiter.
+
+import asyncio
+import time
+
+from igscraper.ratelimit import AsyncTokenBucket
+
+def test_burst_is_served_immediately_then_paced():
+    bucket = AsyncTokenBucket(rate=20, capacity=2, cooldown_s=1)
+
+    async def take(n):
+        start = time.monotonic()
+        for _ in range(n):
+            await bucket.acquire()
+        return time.monotonic() - start
+
+    # The two burst tokens are free; the next two cost 1/20 s each.
+    assert asyncio.run(take(2)) < 0.02
+    assert asyncio.run(take(2)) >= 0.09
+
+def test_penalize_halves_rate_down_to_a_floor():
+    bucket = AsyncTokenBucket(rate=16, capacity=1, cooldown_s=60)
+    bucket.penalize()
+    assert bucket.rate == 8
+    for _ in range(10):
+        bucket.penalize()
+    assert bucket.rate == 1 # base_rate / 16
+
+def test_penalize_with_retry_after_drains_the_bucket():
+    bucket = AsyncTokenBucket(rate=4, capacity=4, cooldown_s=60)
+    bucket.penalize(retry_after_s=5)
+    # At the halved rate (2/s), -10 tokens take the requested 5 s to refill to zero.
+    assert bucket._tokens == -10
+
+def test_rate_recovers_after_cooldown():
+    bucket = AsyncTokenBucket(rate=10, capacity=1, cooldown_s=2)
+    bucket.penalize()
+    now = bucket._cooldown_until
+    bucket._refill(now) # Cool-down just ended; no recovery yet
+    assert bucket.rate == 5
+    bucket._refill(now + 1) # Half a cool-down window regains half the base rate
+    assert bucket.rate == 10
@@ -0,0 +1,70 @@
+# tests/test_scraper.py
+# Tests for the scraper's resume file reader and in-page JS helpers.
+
+import asyncio
+import json
+import shutil
+import subprocess
+
+import pytest
+from pyppeteer.chromium_downloader import check_chromium
+from pyppeteer.helper import evaluationString
+
+from igscraper.browser import setup_browser
+from igscraper.scraper import (
+    _read_jsonl,
+    install_page_helpers,
+    _PAGE_HELPERS_JS,
+    _PROFILE_TEXT_CALL_JS,
+    _SCROLL_STEP_CALL_JS,
+    _REEL_SNAPSHOT_CALL_JS
+)
+
+def test_read_jsonl_missing_file(tmp_path):
+    assert _read_jsonl(tmp_path / 'missing.jsonl') == []
+
+def test_read_jsonl_skips_truncated_last_line(tmp_path):
+    path = tmp_path / 'reels_user.jsonl'
+    records = [{"shortcode": "A"}, {"shortcode": "B"}]
+    path.write_text(''.join(json.dumps(r) + '\n' for r in records) + '{"shortcode": "C", "ca', encoding='utf-8')
+    assert _read_jsonl(path) == records
+
+def _run_node(script: str) -> subprocess.CompletedProcess:
+    return subprocess.run(['node', '-e', script], capture_output=True, text=True, timeout=30)
+
+node = pytest.mark.skipif(shutil.which('node') is None, reason='node is not installed')
+
+@node
+def test_page_helpers_parse_as_new_document_script():
+    # evaluateOnNewDocument runs its source as `(src)()`; with a stand-in window
+    # the bundle must define every helper the call stubs use.
+    script = 'globalThis.window = {};\n' + evaluationString(_PAGE_HELPERS_JS) + ''';
+        const h = window.__igscraper;
+        if (!['profileText', 'scrollStep', 'reelSnapshot'].every(k => typeof h[k] === 'function')) process.exit(1);
+    '''
+    result = _run_node(script)
+    assert result.returncode == 0, result.stderr
+
+@node
+@pytest.mark.parametrize('source', [_PROFILE_TEXT_CALL_JS, _SCROLL_STEP_CALL_JS, _REEL_SNAPSHOT_CALL_JS])
+def test_call_stubs_are_function_expressions(source):
+    result = _run_node(f'if (typeof ({source}) !== "function") process.exit(1);')
+    assert result.returncode == 0, result.stderr
+
+@pytest.mark.skipif(not check_chromium(), reason="pyppeteer's Chromium is not downloaded")
+def test_page_helpers_are_installed_after_goto():
+    async def run():
+        browser = await setup_browser()
+        try:
+            page = await browser.newPage()
+            await install_page_helpers(page)
+            await page.goto('data:text/html,<body><a href="https://www.instagram.com/reel/ABC/">x</a>Hello</body>')
+            helpers = await page.evaluate('() => Object.keys(window.__igscraper || {}).sort()')
+            text = await page.evaluate(_PROFILE_TEXT_CALL_JS)
+            return helpers, text
+        finally:
+            await browser.close()
+
+    helpers, text = asyncio.run(run())
+    assert helpers == ['profileText', 'reelSnapshot', 'scrollStep']
+    assert 'Hello' in text